@@ -5,10 +5,11 @@ from typing import Optional, Tuple, TYPE_CHECKING
 
 import color
 import exceptions
+from entity import Actor, Item
 
 if TYPE_CHECKING:
     from engine import Engine
-    from entity import Actor, Entity, Item, Object
+    from entity import Entity, Object
 
 # default action
 class Action:
@@ -35,16 +36,14 @@ class PickupAction(Action):
         super().__init__(entity)
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
+        for item in self.engine.game_map.get_entities_at_location(self.entity.x, self.entity.y):
+            if isinstance(item, Item):
                 if len(inventory.items) >= inventory.capacity:
                     raise exceptions.Impossible('There\'s no room in your inventory')
 
-                self.engine.game_map.entities.remove(item)
+                self.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
 
@@ -217,7 +216,7 @@ class MovementAction(ActionWithDirection):
         if not self.engine.game_map.tiles['walkable'][dest_x, dest_y]:
             raise exceptions.Impossible('That way is blocked')
         # if the destination is blocked by another entity do nothing
-        if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
+        if self.engine.game_map.is_blocked(dest_x, dest_y):
             raise exceptions.Impossible('That way is blocked')
 
         self.entity.move(self.dx, self.dy)
@@ -252,15 +251,16 @@ class PushAction(ActionWithDirection):
             return
         # if the destination is blocked by another entity make the target take damage
         # but do nothing otherwise
-        if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
+        blocker = self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y)
+        if blocker is not None:
             if isinstance(target, Actor):
                 self.engine.message_log.add_message(
-                    f'{push_desc} into {self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y).name}, both take 1 damage', color.player_atk
+                    f'{push_desc} into {blocker.name}, both take 1 damage', color.player_atk
                 )
                 target.fighter.hp -= 1
             else:
                 self.engine.message_log.add_message(
-                    f'{push_desc} into into {self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y).name}', color.player_atk
+                    f'{push_desc} into into {blocker.name}', color.player_atk
                 )
             # self.engine.game_map.get_actor_at_location(dest_x, dest_y).fighter.hp -= 1
             return
@@ -0,0 +1,89 @@
+'''Time of enemy turns against number of monsters chasing the player
+
+run from the source folder with `python -m benchmarks.ai_turns`
+'''
+from __future__ import annotations
+
+import random
+
+import numpy as np
+
+import entity_factories
+from benchmarks.common import make_engine, time_it
+from game_map import GameMap
+
+TURNS = 10
+
+def legacy_path_cost(game_map: GameMap) -> np.ndarray:
+    # cost array as BaseAI.get_path_to used to build it on every call
+    cost = np.array(game_map.tiles['walkable'], dtype = np.int8)
+    x, y = np.where(game_map.tiles['walkable'])
+
+    for entity in game_map.entities:
+        if entity.blocks_movement and cost[entity.x, entity.y]:
+            cost[entity.x, entity.y] += 10
+
+    for i in range(len(x)):
+        cost[x[i], y[i]] += game_map.tiles[x[i], y[i]]['weight']
+
+    return cost
+
+def populate(map_width: int, map_height: int, count: int):
+    engine = make_engine(map_width, map_height)
+    game_map = engine.game_map
+    # every monster sees the player, so all of them chase
+    game_map.visible[:] = True
+
+    for _ in range(count):
+        while True:
+            x = random.randrange(1, map_width - 1)
+            y = random.randrange(1, map_height - 1)
+            if not game_map.get_entities_at_location(x, y):
+                break
+        entity_factories.orc.spawn(x, y, game_map)
+
+    return engine
+
+def main() -> None:
+    random.seed(1337)
+
+    for map_width, map_height in ((80, 40), (200, 200)):
+        print(f'\nmap {map_width}x{map_height}')
+        print(
+            f'{"monsters":>10} {"turn ms":>10} {"ms/monster":>12} {"cost old us":>12} {"cost new us":>12}'
+            f' {"path hits":>10} {"repairs":>10} {"misses":>10}'
+        )
+
+        for count in (1, 5, 10, 25, 50, 100):
+            engine = populate(map_width, map_height, count)
+            game_map = engine.game_map
+
+            cost_old = time_it(lambda: legacy_path_cost(game_map), 5)
+            cost_new = time_it(game_map.get_path_cost, 50)
+
+            # player walks back and forth, so the monsters have to keep up with it
+            steps = iter([(1, 0), (1, 0), (0, 1), (-1, 0), (-1, 0), (0, -1)] * TURNS)
+
+            def turn() -> None:
+                dx, dy = next(steps)
+                if not game_map.get_blocking_entity_at_location(engine.player.x + dx, engine.player.y + dy):
+                    engine.player.move(dx, dy)
+                engine.handle_enemy_turns()
+
+            turn_time = time_it(turn, TURNS)
+
+            # each monster counts its own path cache use, sum them up
+            stats = {'hits': 0, 'repairs': 0, 'misses': 0}
+            for actor in game_map.actors:
+                if actor is not engine.player and actor.ai:
+                    for name in stats:
+                        stats[name] += actor.ai.path_cache_stats[name]
+
+            print(
+                f'{count:>10} {turn_time * 1e3:>10.2f} {turn_time / count * 1e3:>12.3f}'
+                f' {cost_old * 1e6:>12.0f} {cost_new * 1e6:>12.1f}'
+                f' {stats["hits"]:>10} {stats["repairs"]:>10} {stats["misses"]:>10}'
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''Cave smoothing passes of procgen.generate_dungeon, 7 passes of B5678/S345678 and 4 alternating
+B78/S5678 and B678/S45678, done on tiles with convolve2d against the uint8 automata
+
+run from the source folder with `python -m benchmarks.cellular_automata`
+'''
+from __future__ import annotations
+
+import numpy as np
+from scipy import signal # type: ignore
+
+import tile_types
+from benchmarks.common import make_engine, time_it
+from engine import Engine
+from game_map import GameMap
+from generators.cellular_automata import CellularAutomata, wall_rule
+
+REPEATS = 5
+
+def noise(engine: Engine, map_width: int, map_height: int) -> GameMap:
+    # random fill generate_dungeon starts from
+    game_map = GameMap(engine, map_width, map_height)
+    game_map.tiles = np.where(
+        np.random.default_rng(1337).integers(0, 100, (map_width, map_height)) > 49, tile_types.floor, tile_types.wall
+    )
+    game_map.tiles[[0, -1], :] = tile_types.wall
+    game_map.tiles[:, [0, -1]] = tile_types.wall
+    return game_map
+
+def legacy_pass(dungeon: GameMap, wall_rule: int) -> None:
+    # how generators.cellular_automata.cellular_automata did one pass before
+    count = signal.convolve2d(dungeon.tiles['weight'], [[1, 1, 1], [1, 1, 1], [1, 1, 1]], mode = 'same')
+
+    dungeon.tiles[count < wall_rule] = tile_types.wall
+    dungeon.tiles[count > wall_rule] = tile_types.floor
+
+def legacy_smoothing(engine: Engine, dungeon: GameMap) -> None:
+    # including the helper map generate_dungeon made for nothing
+    GameMap(engine, dungeon.width, dungeon.height)
+    for _ in range(7):
+        legacy_pass(dungeon, 4)
+    for _ in range(2):
+        legacy_pass(dungeon, 6)
+        legacy_pass(dungeon, 5)
+
+def smoothing(dungeon: GameMap, separable: bool) -> None:
+    automata = CellularAutomata(dungeon.tiles['walkable'], separable = separable)
+    automata.run(wall_rule(4), 7)
+    automata.write_back(dungeon)
+    automata.load(dungeon.tiles['walkable'])
+    for _ in range(2):
+        automata.step(wall_rule(6))
+        automata.step(wall_rule(5))
+    automata.write_back(dungeon)
+
+def main() -> None:
+    print(f'{"map":>10} {"convolve2d ms":>14} {"correlate ms":>13} {"separable ms":>13} {"same":>5}')
+
+    for map_width, map_height in ((80, 40), (256, 256), (1024, 1024)):
+        engine = make_engine(map_width, map_height)
+        start = noise(engine, map_width, map_height)
+        dungeon = noise(engine, map_width, map_height)
+
+        def reset() -> GameMap:
+            # same noise every time
+            dungeon.tiles.ids[...] = start.tiles.ids
+            dungeon.tiles.version += 1
+            return dungeon
+
+        before = time_it(lambda: legacy_smoothing(engine, reset()), REPEATS)
+        expected = dungeon.tiles.ids.copy()
+        correlate = time_it(lambda: smoothing(reset(), separable = False), REPEATS)
+        separable = time_it(lambda: smoothing(reset(), separable = True), REPEATS)
+        same = (dungeon.tiles.ids == expected).all()
+
+        print(
+            f'{f"{map_width}x{map_height}":>10} {before * 1e3:>14.1f} {correlate * 1e3:>13.1f}'
+            f' {separable * 1e3:>13.1f} {str(same):>5}'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+'''Shared helpers for the benchmark scripts, builds game state without a window'''
+from __future__ import annotations
+
+import copy
+import time
+from typing import Callable
+
+import numpy as np
+
+import entity_factories
+import tile_types
+from engine import Engine
+from game_map import GameMap, GameWorld
+from generators.cellular_automata import CellularAutomata, wall_rule
+
+def make_engine(map_width: int, map_height: int) -> Engine:
+    # engine with single open floor (walls only around the edges) and player in the middle
+    player = copy.deepcopy(entity_factories.player)
+    engine = Engine(player = player)
+
+    engine.game_world = GameWorld(
+        engine = engine,
+        viewport_width = min(map_width, 80),
+        viewport_height = min(map_height, 40),
+        map_width = map_width,
+        map_height = map_height,
+        initial_open = 49,
+        cellulara_repeats = 7,
+        floors_list = {},
+    )
+
+    game_map = GameMap(engine, map_width, map_height)
+    game_map.tiles[1:-1, 1:-1] = tile_types.floor
+    engine.game_map = game_map
+
+    player.place(map_width // 2, map_height // 2, game_map)
+
+    return engine
+
+def make_cave(engine: Engine, map_width: int, map_height: int, seed: int = 1337) -> GameMap:
+    # cave floor shaped the same way as in procgen.generate_dungeon,
+    # without connecting regions, decorations or entities
+    rng = np.random.default_rng(seed)
+    game_map = GameMap(engine, map_width, map_height)
+
+    game_map.tiles = np.where(
+        rng.integers(0, 100, (map_width, map_height)) > 49, tile_types.floor, tile_types.wall
+    )
+    game_map.tiles[[0, -1], :] = tile_types.wall
+    game_map.tiles[:, [0, -1]] = tile_types.wall
+
+    automata = CellularAutomata(game_map.tiles['walkable'])
+    automata.run(wall_rule(4), 7)
+    automata.write_back(game_map)
+
+    return game_map
+
+def time_it(function: Callable[[], object], repeats: int) -> float:
+    # average wall time of single call in seconds
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
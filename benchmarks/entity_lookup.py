@@ -0,0 +1,49 @@
+'''Turn time against number of entities on the floor
+
+run from the source folder with `python -m benchmarks.entity_lookup`
+'''
+from __future__ import annotations
+
+import random
+
+import entity_factories
+from benchmarks.common import make_engine, time_it
+from components.ai import ConfusedEnemy
+
+MAP_SIZE = 200
+TURNS = 20
+
+def populate(count: int):
+    engine = make_engine(MAP_SIZE, MAP_SIZE)
+    game_map = engine.game_map
+
+    # confused monsters bump around randomly, so every turn of theirs
+    # asks the map who is standing on the tile they try to enter
+    for _ in range(count):
+        x = random.randrange(1, MAP_SIZE - 1)
+        y = random.randrange(1, MAP_SIZE - 1)
+        monster = entity_factories.orc.spawn(x, y, game_map)
+        monster.fighter.max_hp = monster.fighter.hp = 10_000
+        monster.ai = ConfusedEnemy(monster, previous_ai = monster.ai, turns_remaining = 10_000)
+
+    return engine
+
+def main() -> None:
+    random.seed(1337)
+    print(f'{"entities":>10} {"turn ms":>10} {"us/actor":>10} {"lookup us":>10}')
+
+    for count in (10, 100, 1000, 2500, 5000):
+        engine = populate(count)
+        game_map = engine.game_map
+
+        turn = time_it(engine.handle_enemy_turns, TURNS)
+
+        points = [(random.randrange(MAP_SIZE), random.randrange(MAP_SIZE)) for _ in range(1000)]
+        lookup = time_it(
+            lambda: [game_map.get_blocking_entity_at_location(x, y) for x, y in points], 10
+        ) / len(points)
+
+        print(f'{count:>10} {turn * 1e3:>10.2f} {turn / count * 1e6:>10.2f} {lookup * 1e6:>10.3f}')
+
+if __name__ == '__main__':
+    main()
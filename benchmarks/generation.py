@@ -0,0 +1,124 @@
+'''Floor generation time, along with region detection done by flood fill against labelling
+and decorating with per tile loop against drawing everything at once
+
+run from the source folder with `python -m benchmarks.generation`
+'''
+from __future__ import annotations
+
+from typing import Callable, List, Set, Tuple
+
+import numpy as np
+
+from benchmarks.common import make_cave, make_engine, time_it
+from game_map import GameMap
+from generators.decorators import add_features
+from helpers.region_connection import Regions
+from helpers.rng import nprng
+from procgen import generate_dungeon
+import tile_types
+
+# flood fill gets too slow to wait for above this many tiles
+LEGACY_MAX_AREA = 256 * 256
+
+def legacy_get_regions(walkable: np.ndarray) -> List[Set[Tuple[int, int]]]:
+    # how helpers.region_connection found regions before, BFS over tuples
+    regions = []
+    visited: Set[Tuple[int, int]] = set()
+
+    for x in range(walkable.shape[0]):
+        for y in range(walkable.shape[1]):
+            if (x, y) in visited or not walkable[x, y]:
+                continue
+
+            new_region: Set[Tuple[int, int]] = set()
+            queue = [(x, y)]
+
+            while queue:
+                current = queue.pop(0)
+
+                if current in visited or not walkable[current]:
+                    continue
+
+                new_region.add(current)
+                visited.add(current)
+
+                for neighbour in (
+                    (current[0] - 1, current[1]),
+                    (current[0] + 1, current[1]),
+                    (current[0], current[1] - 1),
+                    (current[0], current[1] + 1),
+                ):
+                    if neighbour not in visited and walkable[neighbour]:
+                        queue.append(neighbour)
+
+            if new_region:
+                regions.append(new_region)
+
+    return regions
+
+def legacy_add_features(dungeon: GameMap) -> GameMap:
+    # how generators.decorators.add_features decorated before, one random tile at a time
+    x, y = np.where(dungeon.tiles['walkable'])
+
+    for _ in range(len(x)):
+        j = nprng.integers(len(x))
+
+        feature = nprng.choice(4)
+        chance = nprng.random()
+
+        if feature == 0:
+            if chance < .10:
+                dungeon.tiles[x[j], y[j]] = tile_types.loose_grass
+            elif chance < .5:
+                dungeon.tiles[x[j], y[j]] = tile_types.grass
+        elif feature == 1:
+            if chance < .10:
+                dungeon.tiles[x[j], y[j]] = tile_types.loose_rubble
+            elif chance < .5:
+                dungeon.tiles[x[j], y[j]] = tile_types.rubble
+        elif feature == 2:
+            if chance < .5:
+                dungeon.tiles[x[j], y[j]] = tile_types.stalactite
+            elif chance > .5:
+                dungeon.tiles[x[j], y[j]] = tile_types.stalagmite
+
+    return dungeon
+
+def decorate(dungeon: GameMap, ids: np.ndarray, add: Callable[[GameMap], GameMap]) -> None:
+    # decorate the same undecorated cave every time
+    dungeon.tiles.ids[...] = ids
+    dungeon.tiles.version += 1
+    add(dungeon)
+
+def main() -> None:
+    print(f'{"map":>10} {"regions":>8} {"flood fill ms":>14} {"labelling ms":>13}'
+          f' {"decor loop ms":>14} {"decor batch ms":>15} {"whole floor ms":>15}')
+
+    for map_width, map_height in ((80, 40), (256, 256), (1024, 1024)):
+        engine = make_engine(map_width, map_height)
+        cave = make_cave(engine, map_width, map_height)
+        walkable = cave.tiles['walkable']
+        ids = cave.tiles.ids.copy()
+
+        regions = Regions(walkable)
+        after = time_it(lambda: Regions(walkable), 5)
+        if map_width * map_height <= LEGACY_MAX_AREA:
+            before = f'{time_it(lambda: legacy_get_regions(walkable), 1) * 1e3:.1f}'
+        else:
+            before = '-'
+
+        if map_width * map_height <= LEGACY_MAX_AREA:
+            decor_before = f'{time_it(lambda: decorate(cave, ids, legacy_add_features), 1) * 1e3:.1f}'
+        else:
+            decor_before = '-'
+        decor_after = time_it(lambda: decorate(cave, ids, add_features), 3)
+
+        floor = time_it(lambda: generate_dungeon(map_width, map_height, 49, 7, engine), 1)
+
+        print(
+            f'{f"{map_width}x{map_height}":>10} {len(regions):>8} {before:>14}'
+            f' {after * 1e3:>13.1f} {decor_before:>14} {decor_after * 1e3:>15.1f} {floor * 1e3:>15.0f}'
+        )
+
+if __name__ == '__main__':
+    main()
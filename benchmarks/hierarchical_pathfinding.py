@@ -0,0 +1,52 @@
+'''Windowed A* against hierarchical search for long paths on big cave maps
+
+run from the source folder with `python -m benchmarks.hierarchical_pathfinding`
+'''
+from __future__ import annotations
+
+import random
+
+import tile_types
+from benchmarks.common import make_cave, make_engine, time_it
+from benchmarks.pathfinding import PAIRS, path_cost, pick_pairs
+from hierarchical_pathfinding import HierarchicalGraph
+from pathfinding import find_path
+
+def main() -> None:
+    random.seed(1337)
+
+    for map_width, map_height in ((256, 256), (512, 512)):
+        engine = make_engine(map_width, map_height)
+        game_map = make_cave(engine, map_width, map_height)
+        cost = game_map.terrain_cost
+
+        graph = HierarchicalGraph()
+        build = time_it(lambda: HierarchicalGraph().update(cost, 0), 1)
+        graph.update(cost, 0)
+
+        # dig a small room in the middle, only clusters around it get rebuilt
+        game_map.tiles[map_width // 2 : map_width // 2 + 6, map_height // 2 : map_height // 2 + 6] = tile_types.floor
+        rebuild = time_it(lambda: graph.update(game_map.terrain_cost, game_map.tiles_version), 1)
+        cost = game_map.terrain_cost
+
+        print(f'{map_width}x{map_height}: full build {build * 1e3:.1f} ms, after digging {rebuild * 1e3:.1f} ms')
+        print(f'{"distance":>10} {"window us":>10} {"hpa us":>10} {"cost ratio":>10}')
+
+        for low, high in ((32, 80), (80, 200), (200, 500)):
+            if high > max(map_width, map_height) and low > max(map_width, map_height) // 2:
+                continue
+            pairs = pick_pairs(cost, low, high)
+
+            window = time_it(lambda: [find_path(cost, *pair) for pair in pairs], 1) / PAIRS
+            hierarchical = time_it(lambda: [graph.find_path(cost, *pair) for pair in pairs], 1) / PAIRS
+
+            ratio = sum(
+                path_cost(cost, start, graph.find_path(cost, start, goal))
+                / path_cost(cost, start, find_path(cost, start, goal))
+                for start, goal in pairs
+            ) / PAIRS
+
+            print(f'{f"{low}-{high}":>10} {window * 1e6:>10.0f} {hierarchical * 1e6:>10.0f} {ratio:>10.3f}')
+
+if __name__ == '__main__':
+    main()
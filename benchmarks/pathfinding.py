@@ -0,0 +1,74 @@
+'''Windowed A* against whole map search for paths of different length
+
+run from the source folder with `python -m benchmarks.pathfinding`
+'''
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+import numpy as np
+import tcod
+from scipy.ndimage import label # type: ignore
+
+from benchmarks.common import make_cave, make_engine, time_it
+from pathfinding import find_path
+
+PAIRS = 50
+
+def full_search(cost: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    # how BaseAI.get_path_to searched before, dijkstra over whole map
+    graph = tcod.path.SimpleGraph(cost = cost, cardinal = 2, diagonal = 3)
+    pathfinder = tcod.path.Pathfinder(graph)
+    pathfinder.add_root(start)
+    return [(x, y) for x, y in pathfinder.path_to(goal)[1:].tolist()]
+
+def path_cost(cost: np.ndarray, start: Tuple[int, int], path: List[Tuple[int, int]]) -> int:
+    total = 0
+    previous = start
+    for x, y in path:
+        diagonal = x != previous[0] and y != previous[1]
+        total += int(cost[x, y]) * (3 if diagonal else 2)
+        previous = (x, y)
+    return total
+
+def pick_pairs(cost: np.ndarray, low: int, high: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # random start and goal in the same cave pocket, between low and high tiles apart
+    regions, _ = label(cost != 0)
+    x, y = np.nonzero(cost)
+    pairs: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+    while len(pairs) < PAIRS:
+        i, j = random.randrange(len(x)), random.randrange(len(x))
+        if regions[x[i], y[i]] != regions[x[j], y[j]]:
+            continue
+        if low <= max(abs(x[i] - x[j]), abs(y[i] - y[j])) <= high:
+            pairs.append(((int(x[i]), int(y[i])), (int(x[j]), int(y[j]))))
+    return pairs
+
+def main() -> None:
+    random.seed(1337)
+    print(f'{"map":>10} {"distance":>10} {"full us":>10} {"window us":>10} {"same cost":>10}')
+
+    for map_width, map_height in ((80, 40), (256, 256), (512, 512)):
+        engine = make_engine(map_width, map_height)
+        cost = make_cave(engine, map_width, map_height).terrain_cost
+
+        for low, high in ((2, 5), (6, 15), (16, 60)):
+            pairs = pick_pairs(cost, low, high)
+
+            full = time_it(lambda: [full_search(cost, *pair) for pair in pairs], 1) / PAIRS
+            window = time_it(lambda: [find_path(cost, *pair) for pair in pairs], 1) / PAIRS
+
+            same = sum(
+                path_cost(cost, start, full_search(cost, start, goal))
+                == path_cost(cost, start, find_path(cost, start, goal))
+                for start, goal in pairs
+            )
+
+            print(
+                f'{f"{map_width}x{map_height}":>10} {f"{low}-{high}":>10}'
+                f' {full * 1e6:>10.0f} {window * 1e6:>10.0f} {f"{same}/{PAIRS}":>10}'
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+'''Frame time of full redraw against redrawing only regions of the screen that changed,
+and of drawing entities one by one against all at once as the floor fills up
+
+run from the source folder with `python -m benchmarks.rendering`
+'''
+from __future__ import annotations
+
+import random
+
+import tcod
+
+import entity_factories
+from benchmarks.common import make_engine, time_it
+from engine import Engine
+from game_map import GameMap
+
+FRAMES = 500
+
+def populate() -> Engine:
+    engine = make_engine(80, 40)
+    for _ in range(30):
+        entity_factories.orc.spawn(random.randrange(1, 79), random.randrange(1, 39), engine.game_map)
+    for i in range(100):
+        engine.message_log.add_message(f'Message number {i} to fill the log with some text')
+    engine.update_fov()
+    return engine
+
+def step(engine: Engine, frame: int) -> None:
+    # player walks back and forth
+    engine.player.move(1 if frame % 2 else -1, 0)
+    engine.update_fov()
+
+def hover(engine: Engine, frame: int) -> None:
+    engine.mouse_location = (frame % 80, 20)
+
+def idle(engine: Engine, frame: int) -> None:
+    pass
+
+def legacy_render_entities(game_map: GameMap, console: tcod.console.Console) -> None:
+    # how GameMap.render drew entities before, sorting and printing each of them
+    for entity in sorted(game_map.entities, key = lambda x: x.render_order.value):
+        if game_map.visible[entity.x, entity.y]:
+            console.print(
+                x = entity.x - game_map.view_start_x, y = entity.y - game_map.view_start_y, string = entity.char, fg = entity.color
+            )
+
+def entities_main() -> None:
+    print(f'{"entities":>10} {"one by one us":>14} {"at once us":>11}')
+
+    for count in (100, 1000, 10000):
+        engine = make_engine(200, 200)
+        for _ in range(count):
+            entity_factories.orc.spawn(random.randrange(1, 199), random.randrange(1, 199), engine.game_map)
+        engine.update_fov()
+        console = tcod.console.Console(80, 50, order = 'F')
+        engine.render(console)
+
+        before = time_it(lambda: legacy_render_entities(engine.game_map, console), 100)
+        after = time_it(lambda: engine.game_map.render_entities(console), 100)
+
+        print(f'{count:>10} {before * 1e6:>14.0f} {after * 1e6:>11.0f}')
+
+def main() -> None:
+    random.seed(1337)
+    print(f'{"frame":>10} {"full us":>10} {"incremental us":>15}')
+
+    for name, change in (('idle', idle), ('hover', hover), ('step', step)):
+        times = []
+        for incremental in (False, True):
+            engine = populate()
+            console = tcod.console.Console(80, 50, order = 'F')
+            frames = iter(range(10 ** 9))
+
+            def frame() -> None:
+                change(engine, next(frames))
+                if not incremental:
+                    console.clear()
+                    engine.render_keys.clear()
+                engine.render(console)
+
+            times.append(time_it(frame, FRAMES))
+
+        print(f'{name:>10} {times[0] * 1e6:>10.0f} {times[1] * 1e6:>15.0f}')
+
+    print()
+    entities_main()
+
+if __name__ == '__main__':
+    main()
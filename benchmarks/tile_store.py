@@ -0,0 +1,78 @@
+'''Structured tile array against TileStore, memory and save size of a floor
+and time of the passes reading tile fields
+
+run from the source folder with `python -m benchmarks.tile_store`
+'''
+from __future__ import annotations
+
+import lzma
+import pickle
+from typing import Any
+
+import numpy as np
+import tcod
+from scipy import signal # type: ignore
+from tcod.map import compute_fov
+
+import tile_types
+from benchmarks.common import make_cave, make_engine, time_it
+from tile_store import TileStore
+
+REPEATS = 20
+
+def legacy_tiles(tiles: TileStore) -> np.ndarray:
+    # same tiles as single fortran ordered array of tile_dt records, how GameMap held them before
+    records = np.empty(tiles.shape, dtype = tile_types.tile_dt, order = 'F')
+    # tile_dt is structured, it always has names
+    for name in tile_types.tile_dt.names or ():
+        records[name] = tiles[name]
+    return records
+
+def saved_size(tiles: Any) -> int:
+    # compressed the same way Engine.save_as does
+    return len(lzma.compress(pickle.dumps(tiles)))
+
+def fov(tiles: Any) -> None:
+    width, height = tiles.shape
+    compute_fov(tiles['transparent'], (width // 2, height // 2), radius = 0)
+
+def pathing(tiles: Any) -> None:
+    # terrain cost the way GameMap.terrain_cost builds it, handed to tcod pathfinding
+    # the search itself doesn't touch tiles, so it's left out
+    cost = np.where(tiles['walkable'], 1 + tiles['weight'], 0).astype(np.int8)
+    tcod.path.SimpleGraph(cost = cost, cardinal = 2, diagonal = 3)
+
+def cellular_pass(tiles: Any) -> None:
+    # one pass of generators.cellular_automata, writes back the tiles it read
+    count = signal.convolve2d(tiles['weight'], [[1, 1, 1], [1, 1, 1], [1, 1, 1]], mode = 'same')
+    tiles[count < 4] = tile_types.wall
+    tiles[count > 4] = tile_types.floor
+
+def main() -> None:
+    print(f'{"map":>10} {"records kB":>11} {"store kB":>10} {"records saved kB":>17} {"store saved kB":>15}')
+    stores = {}
+
+    for map_width, map_height in ((80, 40), (256, 256), (1024, 1024)):
+        store = stores[map_width, map_height] = make_cave(make_engine(map_width, map_height), map_width, map_height).tiles
+        store.clear_cache()
+        records = legacy_tiles(store)
+
+        print(
+            f'{f"{map_width}x{map_height}":>10} {records.nbytes / 1e3:>11.1f} {store.ids.nbytes / 1e3:>10.1f}'
+            f' {saved_size(records) / 1e3:>17.1f} {saved_size(store) / 1e3:>15.1f}'
+        )
+
+    print()
+    print(f'{"map":>10} {"pass":>10} {"records ms":>11} {"store ms":>10}')
+
+    for (map_width, map_height), store in stores.items():
+
+        for name, function in (('fov', fov), ('pathing', pathing), ('cellular', cellular_pass)):
+            records = legacy_tiles(store)
+            before = time_it(lambda: function(records), REPEATS)
+            after = time_it(lambda: function(store), REPEATS)
+
+            print(f'{f"{map_width}x{map_height}":>10} {name:>10} {before * 1e3:>11.2f} {after * 1e3:>10.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -9,45 +9,124 @@ import color
 
 from actions import Action, BumpAction, MeleeAction, MovementAction, PickupAction, WaitAction
 from entity import Actor
+import hierarchical_pathfinding
+from pathfinding import find_path
 
 if TYPE_CHECKING:
     from entity import Actor
 
+# cached path gets its end fixed up at most this many times in a row before it's searched again,
+# every repair can add a step, so without the limit path drifts further from the shortest one
+MAX_PATH_REPAIRS = 8
+
 class BaseAI(Action):
     entity: Actor
 
+    def __init__(self, entity: Actor) -> None:
+        super().__init__(entity)
+        # last path returned by get_path_to, steps are popped off its front as entity walks it
+        self.path: List[Tuple[int, int]] = []
+        self.path_goal: Optional[Tuple[int, int]] = None
+        # repairs made to the path since it was last searched for
+        self.path_repairs = 0
+        # how often get_path_to reused the cached path as is, only fixed its end or had to compute whole new one
+        self.path_cache_stats = {'hits': 0, 'repairs': 0, 'misses': 0}
+
     @abstractmethod
     def perform(self) -> None:
         pass
 
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         # calculates path to target position or returns empty list if no valid path
-        cost = np.array(self.entity.gamemap.tiles['walkable'], dtype = np.int8)
-        x, y = np.where(self.engine.game_map.tiles['walkable'])
-
-        for entity in self.entity.gamemap.entities:
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # add to the cost of blocked position
-                # lower means more entity crowding behind each other
-                # higher incites them to take longer paths to surround player
-                cost[entity.x, entity.y] += 10
-
-        for i in range(len(x)):
-            # if self.engine.game_map.tiles[x[i], y[i]]['walkable'] is True:
-            cost[x[i], y[i]] += self.engine.game_map.tiles[x[i], y[i]]['weight']
-                
-        # create graph from the cost array (flat weight for all but active entities)
-        # pass it to pathfinder
-        graph = tcod.path.SimpleGraph(cost = cost, cardinal = 2, diagonal = 3)
-        pathfinder = tcod.path.Pathfinder(graph)
-
-        pathfinder.add_root((self.entity.x, self.entity.y))
-
-        # calculate path to the destination and remove starting point
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        # convert from List[List] to List[Tuple]
+        # the result is also kept as self.path, so next call can reuse it
+        path = self.get_cached_path(dest_x, dest_y)
+
+        if path is None:
+            self.path_cache_stats['misses'] += 1
+
+            # chasing the player follows distance field shared by all enemies this turn
+            # any other target needs search of its own
+            player = self.engine.player
+            if (dest_x, dest_y) == (player.x, player.y) and self.entity.gamemap is player.gamemap:
+                path = self.get_path_downhill(self.engine.get_chase_field())
+            else:
+                path = self.search_path_to(dest_x, dest_y)
+            self.path_repairs = 0
+
+        self.path = path
+        self.path_goal = (dest_x, dest_y)
+        return path
+
+    def get_cached_path(self, dest_x: int, dest_y: int) -> Optional[List[Tuple[int, int]]]:
+        # returns previous path if it's still good for the destination, with its end fixed up
+        # when the goal moved at most one tile, otherwise None
+        path = self.path
+        goal = (dest_x, dest_y)
+
+        if not path or self.path_goal is None:
+            return None
+        # path has to start right next to the entity, it might have been pushed or confused
+        if max(abs(path[0][0] - self.entity.x), abs(path[0][1] - self.entity.y)) != 1:
+            return None
+        if max(abs(dest_x - self.path_goal[0]), abs(dest_y - self.path_goal[1])) > 1:
+            return None
+        # goal tile is usually taken by the target itself, don't check it
+        if not self.is_path_clear(path[:-1]):
+            return None
+
+        if goal == self.path_goal:
+            self.path_cache_stats['hits'] += 1
+            return path
+
+        if self.path_repairs >= MAX_PATH_REPAIRS:
+            return None
+
+        self.path_repairs += 1
+        self.path_cache_stats['repairs'] += 1
+
+        if goal in path:
+            # target stepped onto our route, cut off the rest
+            return path[: path.index(goal) + 1]
+
+        before_goal = path[-2] if len(path) > 1 else (self.entity.x, self.entity.y)
+        if max(abs(dest_x - before_goal[0]), abs(dest_y - before_goal[1])) <= 1:
+            # new goal is reachable from the tile before the old one
+            return path[:-1] + [goal]
+
+        # otherwise go through old goal to the new one, it's right next to it
+        return path + [goal]
+
+    def is_path_clear(self, path: List[Tuple[int, int]]) -> bool:
+        game_map = self.entity.gamemap
+        if not path:
+            return True
+
+        x, y = zip(*path)
+        return bool(game_map.tiles['walkable'][x, y].all() and not game_map.occupancy[x, y].any())
+
+    def get_path_downhill(self, distance: np.ndarray) -> List[Tuple[int, int]]:
+        # walk down given distance field from entity position to the lowest point around
+        path: List[List[int]] = tcod.path.hillclimb2d(
+            distance, (self.entity.x, self.entity.y), cardinal = True, diagonal = True
+        )[1:].tolist()
+
         return [(index[0], index[1]) for index in path]
+
+    def search_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+        # cached terrain cost with other blocking entities added on top
+        # searched only around entity and destination, unless that's not enough
+        game_map = self.entity.gamemap
+        cost = game_map.get_path_cost()
+        start = (self.entity.x, self.entity.y)
+
+        # far away targets on big maps go through graph of cluster entrances first
+        distance = max(abs(dest_x - start[0]), abs(dest_y - start[1]))
+        if distance >= hierarchical_pathfinding.MIN_DISTANCE:
+            graph = game_map.get_hierarchical_graph()
+            if graph is not None:
+                return graph.find_path(cost, start, (dest_x, dest_y))
+
+        return find_path(cost, start, (dest_x, dest_y))
     
     def wander_around(self):
         # if there is no target to path to, entity will wander around randomly
@@ -77,7 +156,6 @@ class Dummy(BaseAI):
 class SimpleHostileEnemy(BaseAI):
     def __init__(self, entity: Actor):
         super().__init__(entity)
-        self.path:  List[Tuple[int, int]] = []
 
     def perform(self) -> None:
         target = self.engine.player
@@ -102,10 +180,29 @@ class SimpleHostileEnemy(BaseAI):
 
         return WaitAction(self.entity).perform()
 
+# cowardly enemies run away once, when their hp drops to this part of max hp
+FLEE_HP_FRACTION = .25
+FLEE_TURNS = 5
+
+class CowardlyEnemy(SimpleHostileEnemy):
+    # fights like simple hostile enemy, but runs away for a few turns when badly hurt
+    def __init__(self, entity: Actor):
+        super().__init__(entity)
+        self.has_fled = False
+
+    def perform(self) -> None:
+        fighter = self.entity.fighter
+        if not self.has_fled and fighter.hp <= fighter.max_hp * FLEE_HP_FRACTION:
+            self.has_fled = True
+            self.engine.message_log.add_message(f'The {self.entity.name} turns to flee')
+            self.entity.ai = FleeingEnemy(self.entity, self, FLEE_TURNS)
+            return self.entity.ai.perform()
+
+        return super().perform()
+
 class SpellCastingEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
         self.spell_damage = 1
         self.spell_uses = 3
     
@@ -135,43 +232,24 @@ class SpellCastingEnemy(BaseAI):
 class GreedyEnemy(BaseAI):
     def __init__(self, entity: Actor):
         super().__init__(entity)
-        self.path:  List[Tuple[int, int]] = []
 
     def perform(self) -> None:
-        target = next(self.engine.game_map.items, None)
-
-        # selects target from the items list, selects the first item in list
-        # if there is one the goblin with path towards it and bump into things (in theory)
-        # which should make him attack entities he stumbles into while going to pick item
+        # goblin heads for the closest item on the floor, following the shared items map
+        # and bumps into things on the way, which makes him attack entities he stumbles into
         # when he is on top of the item he picks it up
         # currently each goblin enemy is omnipotent and always knows location of each item on given floor
-        if target is not None and len(self.entity.inventory.items) < self.entity.inventory.capacity:
-            dx = target.x - self.entity.x
-            dy = target.y - self.entity.y
-
-            distance = max(abs(dx), abs(dy))
+        if len(self.entity.inventory.items) < self.entity.inventory.capacity:
+            dijkstra_maps = self.entity.gamemap.dijkstra_maps
 
-            # path towards item only if it's in actors field of view
-            # hopefully :v
-            # if self.engine.game_map.visible[target.x, target.y]:
-            if distance <= 0:
+            if dijkstra_maps.get('items')[self.entity.x, self.entity.y] == 0:
                 return PickupAction(self.entity).perform()
-            elif 1 < distance < 10:
-                self.path = self.get_path_to(target.x, target.y)
-            elif distance > 10:
-                target = next(self.engine.game_map.items, None)
-            else:
-                print(f'nothing to target')
-                self.wander_around()
-                
 
-            if self.path:
-                dest_x, dest_y = self.path.pop(0)
+            step = dijkstra_maps.get_step('items', self.entity.x, self.entity.y)
+            if step:
+                dest_x, dest_y = step
                 return BumpAction(
                     self.entity, dest_x - self.entity.x, dest_y - self.entity.y
                 ).perform()
-            else:
-                self.wander_around()
 
         self.wander_around()
 
@@ -210,12 +288,36 @@ class ConfusedEnemy(BaseAI):
 
             return BumpAction(self.entity, direction_x, direction_y).perform()
 
+class FleeingEnemy(BaseAI):
+    # actor runs away from the player for given number of turns, then returns to previous ai
+    # uses the flee map shared by whole floor, so it costs next to nothing per fleeing actor
+    def __init__(self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int):
+        super().__init__(entity)
+
+        self.previous_ai = previous_ai
+        self.turns_remaining = turns_remaining
+
+    def perform(self) -> None:
+        if self.turns_remaining <= 0:
+            self.entity.ai = self.previous_ai
+            return
+
+        self.turns_remaining -= 1
+
+        step = self.entity.gamemap.dijkstra_maps.get_step('flee', self.entity.x, self.entity.y)
+        if step:
+            dest_x, dest_y = step
+            return MovementAction(
+                self.entity, dest_x - self.entity.x, dest_y - self.entity.y
+            ).perform()
+
+        return WaitAction(self.entity).perform()
+
 class MimicHostileEnemy(BaseAI):
     # we grab on init original position of the entity
     # and if we showed message in log
     def __init__(self, entity: Actor):
         super().__init__(entity)
-        self.path:  List[Tuple[int, int]] = []
         self.message = False
         self.origin_x = 0
         self.origin_y = 0
@@ -239,6 +341,7 @@ class MimicHostileEnemy(BaseAI):
                 self.entity.char = 'M'
                 self.entity.color = color.anb_red
                 self.entity.name = 'Mimic'
+                self.entity.gamemap.update_entity(self.entity) # looks different now
                 self.entity.fighter.base_defense = 2
                 self.entity.fighter.base_power = 4
                 # self.entity.ai = HostileEnemy
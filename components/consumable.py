@@ -83,18 +83,16 @@ class LightningDamageConsumable(Consumable):
 
     def activate(self, action: actions.ItemAction) -> None:
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 1.0
         # this might require rewriting as now dummy actors (tables etc)
         # will be considered a viable target for the spell,
         # which might not be the preferred course of action
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        target = self.gamemap.entity_table.nearest_visible_actor(
+            consumer.x,
+            consumer.y,
+            self.gamemap.visible,
+            max_distance = self.maximum_range,
+            exclude = consumer,
+        )
 
         if target:
             self.engine.message_log.add_message(
@@ -160,13 +158,12 @@ class FireballDamageConsumable(Consumable):
             raise Impossible('You cannot target an area that you cannot see')
 
         targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f'The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage'
-                )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
+        for actor in self.engine.game_map.entity_table.actors_within_radius(*target_xy, self.radius):
+            self.engine.message_log.add_message(
+                f'The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage'
+            )
+            actor.fighter.take_damage(self.damage)
+            targets_hit = True
 
         if not targets_hit:
             raise Impossible('There are no targets in radius')
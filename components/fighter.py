@@ -71,6 +71,7 @@ class Fighter(BaseComponent):
         self.parent.ai = None
         self.parent.name = f'Corpse of {self.parent.name}'
         self.parent.render_order = RenderOrder.CORPSE
+        self.gamemap.update_entity(self.parent) # move it over to corpses
 
         self.engine.message_log.add_message(death_massage, death_massage_color)
 
@@ -122,6 +123,7 @@ class Ticking(BaseComponent):
         self.parent.ai = None
         self.parent.name = f''
         self.parent.render_order = RenderOrder.CORPSE
+        self.gamemap.update_entity(self.parent)
 
     def take_damage(self, amount: int):
         pass
\ No newline at end of file
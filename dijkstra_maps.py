@@ -0,0 +1,119 @@
+'''Cached dijkstra maps over GameMap terrain for goals other than chasing the player'''
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+import tcod
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# offsets of the tiles around, cardinal ones first so they win ties with diagonals
+NEIGHBOURS = (
+    (0, -1), (-1, 0), (1, 0), (0, 1),
+    (-1, -1), (1, -1), (-1, 1), (1, 1),
+)
+
+# how strongly fleeing entities prefer distance over running into corners
+FLEE_FACTOR = 1.2
+
+def items_key(gamemap: GameMap) -> Hashable:
+    return gamemap.items_version
+
+def items_goals(gamemap: GameMap) -> List[Tuple[int, int]]:
+    return [(item.x, item.y) for item in gamemap.items]
+
+def stairs_key(gamemap: GameMap) -> Hashable:
+    return gamemap.downstairs_location, gamemap.upstairs_location
+
+def stairs_goals(gamemap: GameMap) -> List[Tuple[int, int]]:
+    # stairs not placed yet are left at (0, 0), which is a wall corner and not a goal
+    locations = (gamemap.downstairs_location, gamemap.upstairs_location)
+    return [location for location in locations if location != (0, 0)]
+
+def player_key(gamemap: GameMap) -> Hashable:
+    player = gamemap.engine.player
+    return player.x, player.y
+
+def player_goals(gamemap: GameMap) -> List[Tuple[int, int]]:
+    player = gamemap.engine.player
+    return [(player.x, player.y)] if player.gamemap is gamemap else []
+
+# goal set name -> (what the map depends on, where the goals are)
+GOALS: Dict[str, Tuple[Callable[[GameMap], Hashable], Callable[[GameMap], List[Tuple[int, int]]]]] = {
+    'items': (items_key, items_goals),
+    'stairs': (stairs_key, stairs_goals),
+    'player': (player_key, player_goals),
+}
+
+class DijkstraMaps:
+    '''Registry of distance maps keyed by goal set ('items', 'stairs', 'player', 'flee').
+    Each map is built on terrain cost only and rebuilt when its goals or the tiles change,
+    so AIs can follow the gradient at constant cost per step instead of pathfinding.
+    '''
+
+    def __init__(self, gamemap: GameMap):
+        self.gamemap = gamemap
+        self.maps: Dict[str, np.ndarray] = {}
+        self.keys: Dict[str, Hashable] = {}
+
+    def __getstate__(self) -> dict:
+        # no point storing the maps in saves, they are rebuilt on demand
+        return {'gamemap': self.gamemap, 'maps': {}, 'keys': {}}
+
+    def clear(self) -> None:
+        # drop all maps, they are rebuilt on next get
+        self.maps.clear()
+        self.keys.clear()
+
+    def get(self, name: str) -> np.ndarray:
+        # flee map is derived from distance to the player, so it shares its key
+        key_function, _ = GOALS['player' if name == 'flee' else name]
+        key = (self.gamemap.tiles_version, key_function(self.gamemap))
+
+        if self.keys.get(name) != key:
+            if name == 'flee':
+                self.maps[name] = self.build_flee_map()
+            else:
+                self.maps[name] = self.build_map(GOALS[name][1](self.gamemap))
+            self.keys[name] = key
+
+        return self.maps[name]
+
+    def build_map(self, goals: List[Tuple[int, int]]) -> np.ndarray:
+        cost = self.gamemap.terrain_cost
+        distance = tcod.path.maxarray(cost.shape, order = 'F')
+
+        for x, y in goals:
+            distance[x, y] = 0
+
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out = distance)
+        return distance
+
+    def build_flee_map(self) -> np.ndarray:
+        # invert distance to the player and let it settle again,
+        # entities rolling down this map run away but avoid dead ends when they can
+        towards_player = self.get('player')
+        unreachable = np.iinfo(towards_player.dtype).max
+        reachable = towards_player != unreachable
+
+        distance = np.full_like(towards_player, unreachable)
+        distance[reachable] = -(towards_player[reachable] * FLEE_FACTOR).astype(towards_player.dtype)
+
+        tcod.path.dijkstra2d(distance, self.gamemap.terrain_cost, 2, 3, out = distance)
+        return distance
+
+    def get_step(self, name: str, x: int, y: int) -> Optional[Tuple[int, int]]:
+        # neighbouring tile lowest on the map, None if there is nowhere downhill to go
+        distance = self.get(name)
+        best = distance[x, y]
+        step = None
+
+        for dx, dy in NEIGHBOURS:
+            next_x, next_y = x + dx, y + dy
+            if self.gamemap.in_bounds(next_x, next_y) and distance[next_x, next_y] < best:
+                best = distance[next_x, next_y]
+                step = next_x, next_y
+
+        return step
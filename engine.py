@@ -6,19 +6,25 @@ import lzma
 import pickle
 import color
 
-from typing import TYPE_CHECKING
+from typing import Callable, Dict, Hashable, Optional, Tuple, TYPE_CHECKING
 
+import numpy as np
+import tcod
 from tcod.console import Console
 from tcod.map import compute_fov
 
 import exceptions
 import render_function
 from message_log import MessageLog
+import tile_types
 
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
 
+# what console.clear leaves behind
+BLANK = np.array((ord(' '), color.white, color.black), dtype = tile_types.graphic_dt)
+
 class Engine:
     game_map: GameMap
     game_world: GameWorld
@@ -27,8 +33,25 @@ class Engine:
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
+        # distance from the player for chasing AIs, shared by all of them in a turn
+        self.chase_field: Optional[np.ndarray] = None
+        self.fov_radius = 8
+        # FOV passes done and skipped because nothing changed, since start of the turn
+        self.fov_stats = {'computed': 0, 'skipped': 0}
+        # what each region of the screen shows right now, see render
+        self.render_keys: Dict[str, Hashable] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['render_keys'] = {}
+        # chase field is computed again on the first enemy turn after loading
+        state['chase_field'] = None
+        return state
 
     def handle_enemy_turns(self) -> None:
+        self.chase_field = None # player moved or acted, old one is stale
+        self.fov_stats = {'computed': 0, 'skipped': 0}
+
         for entity in set(self.game_map.actors) - {self.player}:
             if entity.ai:
                 try:
@@ -36,51 +59,135 @@ class Engine:
                 except exceptions.Impossible:
                     pass # ignore impossible action from AI
 
+    def get_chase_field(self) -> np.ndarray:
+        # dijkstra map rooted at the player, computed once per turn on first use
+        # enemies walk downhill on it instead of each running their own search
+        if self.chase_field is None:
+            cost = self.game_map.get_path_cost()
+            distance = tcod.path.maxarray(cost.shape, order = 'F')
+            distance[self.player.x, self.player.y] = 0
+            tcod.path.dijkstra2d(distance, cost, 2, 3, out = distance)
+            self.chase_field = distance
+
+        return self.chase_field
+
     def update_fov(self) -> None:
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles['transparent'],
-            (self.player.x, self.player.y),
-            radius = 8,
+        # called on every frame and after each action, but FOV only changes
+        # when player moves, radius changes or tiles (and their transparency) do
+        fov_key = (self.player.x, self.player.y, self.fov_radius, self.game_map.tiles_version)
+        if self.game_map.fov_key == fov_key:
+            self.fov_stats['skipped'] += 1
+            return
+
+        # nothing past the radius can be seen, so only square around player is computed
+        # and only tiles visible last time (within previous window) need clearing
+        game_map = self.game_map
+        x1, y1 = max(self.player.x - self.fov_radius, 0), max(self.player.y - self.fov_radius, 0)
+        x2 = min(self.player.x + self.fov_radius + 1, game_map.width)
+        y2 = min(self.player.y + self.fov_radius + 1, game_map.height)
+
+        previous_window = game_map.fov_window
+        if previous_window is None:
+            game_map.visible[:] = False
+        else:
+            game_map.visible[previous_window] = False
+        game_map.mark_fov_changed(previous_window)
+
+        window = np.s_[x1:x2, y1:y2]
+        game_map.visible[window] = compute_fov(
+            game_map.tiles['transparent'][window],
+            (self.player.x - x1, self.player.y - y1),
+            radius = self.fov_radius,
         )
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[window] |= game_map.visible[window]
+        game_map.fov_window = window
+        game_map.mark_fov_changed(window)
+        game_map.fov_key = fov_key
+        self.fov_stats['computed'] += 1
+
+    def render_region(
+        self, console: Console, name: str, region: Tuple[int, int, int, int], key: Hashable, draw: Callable[[], None]
+    ) -> None:
+        # redraw region of the screen only if key of what it shows changed since last frame
+        # main loop forgets all keys when it clears the console, then everything gets drawn
+        if name in self.render_keys:
+            if self.render_keys[name] == key:
+                return
+            x, y, width, height = region
+            console.rgb[x : x + width, y : y + height] = BLANK
+
+        draw()
+        self.render_keys[name] = key
 
     def render(self, console: Console) -> None:
-        self.game_map.render(console)
+        game_map = self.game_map
+        messages = self.message_log.messages
+
+        map_key = (
+            game_map, game_map.visibility, self.player.x, self.player.y,
+            game_map.tiles_version, game_map.fov_key, game_map.entities_version,
+        )
+
+        self.render_region(
+            console, 'map', (0, 0, self.game_world.viewport_width, self.game_world.viewport_height),
+            map_key, lambda: game_map.render(console)
+        )
 
-        self.message_log.render(
-            console = console, x = 21, y = 45, width = 50, height = 5
+        self.render_region(
+            console, 'log', (21, 45, 50, 5),
+            (len(self.message_log), messages[-1].count if messages else 0),
+            lambda: self.message_log.render(
+                console = console, x = 21, y = 45, width = 50, height = 5
+            )
         )
 
-        render_function.render_bar(
-            console = console,
-            current_value = self.player.fighter.hp,
-            maximum_value = self.player.fighter.max_hp,
-            total_width = 20,
-            fill_color = color.anb_green,
-            empty_color = color.anb_red,
-            position = 44,
-            bar_name = 'HP'
+        self.render_region(
+            console, 'hp', (0, 44, 20, 1),
+            (self.player.fighter.hp, self.player.fighter.max_hp),
+            lambda: render_function.render_bar(
+                console = console,
+                current_value = self.player.fighter.hp,
+                maximum_value = self.player.fighter.max_hp,
+                total_width = 20,
+                fill_color = color.anb_green,
+                empty_color = color.anb_red,
+                position = 44,
+                bar_name = 'HP'
+            )
         )
 
-        render_function.render_bar(
-            console = console,
-            current_value = self.player.level.current_xp,
-            maximum_value = self.player.level.experience_to_next_level,
-            total_width = 20,
-            fill_color = color.anb_purple,
-            empty_color = color.grey,
-            position = 45,
-            bar_name = 'XP'
+        self.render_region(
+            console, 'xp', (0, 45, 20, 1),
+            (self.player.level.current_xp, self.player.level.experience_to_next_level),
+            lambda: render_function.render_bar(
+                console = console,
+                current_value = self.player.level.current_xp,
+                maximum_value = self.player.level.experience_to_next_level,
+                total_width = 20,
+                fill_color = color.anb_purple,
+                empty_color = color.grey,
+                position = 45,
+                bar_name = 'XP'
+            )
         )
 
-        render_function.render_dungeon_level(
-            console = console,
-            dungeon_level = self.game_world.current_floor,
-            location = (0, 46)
+        self.render_region(
+            console, 'level', (0, 46, 21, 1),
+            self.game_world.current_floor,
+            lambda: render_function.render_dungeon_level(
+                console = console,
+                dungeon_level = self.game_world.current_floor,
+                location = (0, 46)
+            )
         )
 
-        render_function.render_names_at_mouse_location(
-            console = console, x = 21, y = 44, engine = self
+        # names under the mouse change with entities and FOV as well
+        self.render_region(
+            console, 'hover', (21, 44, console.width - 21, 1),
+            (self.mouse_location, map_key),
+            lambda: render_function.render_names_at_mouse_location(
+                console = console, x = 21, y = 44, engine = self
+            )
         )
 
     def save_as(self, filename: str) -> None:
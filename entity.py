@@ -44,7 +44,7 @@ class Entity:
         if parent:
             # if parent isn't provided now, it will be set later
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
@@ -56,20 +56,28 @@ class Entity:
         clone.x = x # using factories we just copy coordinates provided during placement
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone) # add clone to the gamemap object to hold
+        gamemap.add_entity(clone) # add clone to the gamemap object to hold
         return clone
 
+    @property
+    def on_gamemap(self) -> bool:
+        # False when entity sits in inventory or wasn't placed anywhere yet
+        return hasattr(self, 'parent') and self.parent is self.gamemap
+
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         # place entity at new location, handles moving across gamemaps
-        self.x = x
-        self.y = y
-        # gamemap.entities.add(self)
         if gamemap:
-            if hasattr(self, "parent"): # possibly uninitialized
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+            if self.on_gamemap:
+                self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        else:
+            self.x = x
+            self.y = y
+            if self.on_gamemap:
+                self.gamemap.update_entity_location(self)
 
     def distance(self, x: int, y: int) -> float:
         # returns distance between this entity and givens x and y
@@ -78,6 +86,8 @@ class Entity:
     def move(self, dx: int, dy: int) -> None:
         self.x += dx
         self.y += dy
+        if self.on_gamemap:
+            self.gamemap.update_entity_location(self)
 
 class Actor(Entity):
     def __init__(
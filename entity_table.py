@@ -0,0 +1,173 @@
+'''Struct of arrays with positions, flags and glyphs of entities placed on GameMap'''
+from __future__ import annotations
+
+from typing import Dict, List, Optional, TYPE_CHECKING, cast
+
+import numpy as np
+
+from entity import Actor, Item, Object
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+# bit flags describing what kind of entity sits in given slot
+# empty slots have no flags set, so they never match any query
+BLOCKS = 1
+ACTOR = 2 # living actors only
+CORPSE = 4
+ITEM = 8
+OBJECT = 16
+ANY = BLOCKS | ACTOR | CORPSE | ITEM | OBJECT
+
+def flags_for(entity: Entity) -> int:
+    flags = 0
+
+    if entity.blocks_movement:
+        flags |= BLOCKS
+
+    if isinstance(entity, Actor):
+        flags |= ACTOR if entity.is_alive else CORPSE
+    elif isinstance(entity, Item):
+        flags |= ITEM
+    elif isinstance(entity, Object):
+        flags |= OBJECT
+
+    return flags
+
+class EntityTable:
+    '''Each entity gets a slot (row) in the arrays, slots are reused after removal.
+    GameMap keeps it in sync, so queries can be answered with single array operations
+    instead of looping over entities in Python.
+    '''
+
+    def __init__(self, capacity: int = 64):
+        self.x = np.zeros(capacity, dtype = np.int32)
+        self.y = np.zeros(capacity, dtype = np.int32)
+        self.flags = np.zeros(capacity, dtype = np.uint8)
+        # what GameMap.render draws, codepoint (0 for no glyph), color
+        # and render order value of entity, -1 for empty slots
+        self.ch = np.zeros(capacity, dtype = np.int32)
+        self.fg = np.zeros((capacity, 3), dtype = np.uint8)
+        self.layer = np.full(capacity, -1, dtype = np.int8)
+
+        self.entities: List[Optional[Entity]] = [None] * capacity
+        self.slot_of: Dict[Entity, int] = {}
+
+        # free slots, popped from the end so lowest ones are reused first
+        self.free_slots: List[int] = list(range(capacity - 1, -1, -1))
+        # one past the highest slot ever used, queries don't need to look further
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def grow(self) -> None:
+        # double the capacity of all arrays
+        capacity = len(self.entities)
+
+        self.x = np.concatenate((self.x, np.zeros(capacity, dtype = np.int32)))
+        self.y = np.concatenate((self.y, np.zeros(capacity, dtype = np.int32)))
+        self.flags = np.concatenate((self.flags, np.zeros(capacity, dtype = np.uint8)))
+        self.ch = np.concatenate((self.ch, np.zeros(capacity, dtype = np.int32)))
+        self.fg = np.concatenate((self.fg, np.zeros((capacity, 3), dtype = np.uint8)))
+        self.layer = np.concatenate((self.layer, np.full(capacity, -1, dtype = np.int8)))
+
+        self.entities.extend([None] * capacity)
+        self.free_slots = list(range(2 * capacity - 1, capacity - 1, -1)) + self.free_slots
+
+    def add(self, entity: Entity) -> None:
+        if not self.free_slots:
+            self.grow()
+
+        slot = self.free_slots.pop()
+        self.slot_of[entity] = slot
+        self.entities[slot] = entity
+        self.size = max(self.size, slot + 1)
+
+        self.x[slot] = entity.x
+        self.y[slot] = entity.y
+        self.update(entity)
+
+    def remove(self, entity: Entity) -> None:
+        slot = self.slot_of.pop(entity)
+        self.entities[slot] = None
+        self.flags[slot] = 0
+        self.layer[slot] = -1
+        self.free_slots.append(slot)
+
+    def move(self, entity: Entity) -> None:
+        slot = self.slot_of[entity]
+        self.x[slot] = entity.x
+        self.y[slot] = entity.y
+
+    def update(self, entity: Entity) -> None:
+        # refresh flags and glyph after entity changed, ie. actor died and no longer blocks
+        slot = self.slot_of[entity]
+        self.flags[slot] = flags_for(entity)
+        self.ch[slot] = ord(entity.char) if entity.char else 0
+        self.fg[slot] = entity.color
+        self.layer[slot] = entity.render_order.value
+
+    def mask(self, flags: int = ANY) -> np.ndarray:
+        # boolean mask of used slots having any of given flags
+        return (self.flags[: self.size] & flags) != 0
+
+    def select(self, mask: np.ndarray) -> List[Entity]:
+        # entities for slots set in mask, ordered by slot
+        return [self.entities[slot] for slot in np.flatnonzero(mask)] # type: ignore
+
+    def squared_distances(self, x: int, y: int) -> np.ndarray:
+        dx = self.x[: self.size] - x
+        dy = self.y[: self.size] - y
+        return dx * dx + dy * dy
+
+    def within_radius(self, x: int, y: int, radius: float, flags: int = ANY) -> List[Entity]:
+        # entities with any of the flags within euclidean radius from x, y (inclusive)
+        mask = self.mask(flags) & (self.squared_distances(x, y) <= radius * radius)
+        return self.select(mask)
+
+    def nearest_visible(
+        self,
+        x: int,
+        y: int,
+        visible: np.ndarray,
+        max_distance: float,
+        flags: int = ANY,
+        exclude: Optional[Entity] = None,
+    ) -> Optional[Entity]:
+        # closest entity standing on a visible tile, closer than max_distance + 1
+        size = self.size
+        mask = self.mask(flags)
+        mask &= visible[self.x[:size], self.y[:size]]
+
+        if exclude is not None and exclude in self.slot_of:
+            mask[self.slot_of[exclude]] = False
+
+        distances = self.squared_distances(x, y)
+        mask &= distances < (max_distance + 1) ** 2
+
+        if not mask.any():
+            return None
+
+        slot = int(np.argmin(np.where(mask, distances, np.iinfo(distances.dtype).max)))
+        return self.entities[slot]
+
+    # same queries narrowed to living actors, ACTOR flag is only ever set for Actor instances
+    def actors_within_radius(self, x: int, y: int, radius: float) -> List[Actor]:
+        return cast(List[Actor], self.within_radius(x, y, radius, flags = ACTOR))
+
+    def nearest_visible_actor(
+        self,
+        x: int,
+        y: int,
+        visible: np.ndarray,
+        max_distance: float,
+        exclude: Optional[Entity] = None,
+    ) -> Optional[Actor]:
+        return cast(Optional[Actor], self.nearest_visible(x, y, visible, max_distance, flags = ACTOR, exclude = exclude))
+
+    def at_tile(self, x: int, y: int, flags: int = ANY) -> List[Entity]:
+        # entities with any of the flags standing exactly on x, y
+        size = self.size
+        mask = self.mask(flags) & (self.x[:size] == x) & (self.y[:size] == y)
+        return self.select(mask)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Iterable, Iterator, TYPE_CHECKING
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 import numpy as np
 import lzma
 import pickle
@@ -7,7 +7,13 @@ import pickle
 import exceptions
 from tcod.console import Console
 from entity import Actor, Item, Object
+from dijkstra_maps import DijkstraMaps
+from entity_table import EntityTable
+import hierarchical_pathfinding
+from hierarchical_pathfinding import HierarchicalGraph
+from render_order import RenderOrder
 import tile_types
+from tile_store import TileStore
 
 import os.path
 
@@ -26,8 +32,39 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value = tile_types.wall, order='F') # numpy filled with wall tiles in fortran order
+        self.entities: Set[Entity] = set()
+
+        # spatial hash of entities, maps (x, y) to everything standing there
+        # along with the reverse lookup, so we know which bucket to fix when entity moves
+        self.entities_by_location: Dict[Tuple[int, int], List[Entity]] = {}
+        self.location_of_entity: Dict[Entity, Tuple[int, int]] = {}
+
+        # entities split by kind, so we don't filter all of them every time we need one group
+        self._living_actors: Set[Actor] = set()
+        self._corpses: Set[Actor] = set()
+        self._items: Set[Item] = set()
+        self._objects: Set[Object] = set()
+
+        # bumped whenever item appears or disappears from the map
+        self.items_version = 0
+        # bumped whenever any entity is added, removed, moved or changed
+        self.entities_version = 0
+        # names of entities on tiles hovered over, tiles are dropped from it
+        # when entity on them is added, removed, moved or changed
+        self.name_cache: Dict[Tuple[int, int], str] = {}
+
+        # numpy copy of entity positions and flags for area/nearest queries
+        self.entity_table = EntityTable()
+
+        # how many blocking entities stand on each tile, with entities counted in it
+        # kept in sync by the same hooks, so checking tile is just array lookup
+        self.occupancy = np.zeros((width, height), dtype = np.uint16, order = 'F')
+        self._blocking: Set[Entity] = set()
+
+        for entity in entities:
+            self.add_entity(entity)
+
+        self._tiles = TileStore(width, height, fill_value = tile_types.wall) # map filled with wall tiles, stored as tile ids
 
         self.visible = np.full(
             (width, height), fill_value = False, order = 'F'
@@ -38,10 +75,25 @@ class GameMap:
         ) # tiles the player has seen already
 
         self.visibility = visibility
+        # player position, FOV radius and tiles version visible was computed for
+        self.fov_key: Optional[Tuple[int, int, int, int]] = None
+        # part of the map visible was last computed in, nothing outside of it is visible
+        self.fov_window: Optional[Tuple[slice, slice]] = None
+        # windows of the map where FOV changed since last frame
+        self.fov_dirty: List[Tuple[slice, slice]] = []
+
+        # light, dark or SHROUD graphics of tiles in view, with camera and tiles version
+        # they were composed for, between frames only tiles where FOV changed get picked again
+        self.viewport_cache: Optional[np.ndarray] = None
+        self.viewport_key: Optional[Tuple[int, int, int, int, int]] = None
 
         self.downstairs_location = (0, 0)
         self.upstairs_location = (0, 0)
 
+        self.dijkstra_maps = DijkstraMaps(self)
+        # entrance graph for long searches, built on first use and only for big maps
+        self.hierarchical_graph: Optional[HierarchicalGraph] = None
+
         self.view_start_x = 0
         self.view_start_y = 0
 
@@ -49,49 +101,228 @@ class GameMap:
     def gamemap(self) -> GameMap:
         return self
 
+    @property
+    def tiles(self) -> TileStore:
+        return self._tiles
+
+    @tiles.setter
+    def tiles(self, value: np.ndarray) -> None:
+        # whole map of tiles assigned at once, copied into existing store
+        self._tiles[...] = value
+
+    @property
+    def tiles_version(self) -> int:
+        # bumped on every change of tiles, anything derived from tiles checks it
+        return self._tiles.version
+
+    def mark_tiles_changed(self) -> None:
+        # writes through tiles (tiles[x, y] = ...) bump version by themselves,
+        # but writes straight into tile ids (tiles.ids[x, y] = ...) have to call this
+        self._tiles.version += 1
+
+    def clear_caches(self) -> None:
+        # drop everything derived from tiles and entities, for maps that won't be used for a while
+        # each of them gets rebuilt on first use
+        self.tiles.clear_cache()
+        self.__dict__.pop('_terrain_cost', None)
+        self.__dict__.pop('_terrain_cost_version', None)
+        self.viewport_cache = self.viewport_key = None
+        self.fov_dirty = []
+        self.dijkstra_maps.clear()
+        self.hierarchical_graph = None
+        self.name_cache.clear()
+
+    def __getstate__(self) -> dict:
+        # caches derived from tiles get rebuilt after loading
+        state = self.__dict__.copy()
+        state.pop('_terrain_cost', None)
+        state.pop('_terrain_cost_version', None)
+        state['viewport_cache'] = state['viewport_key'] = None
+        state['fov_dirty'] = []
+        return state
+
+    @property
+    def terrain_cost(self) -> np.ndarray:
+        # base movement cost for pathfinding, 0 for tiles that can't be walked on
+        # otherwise 1 + tile weight, rebuilt only after tiles changed
+        if getattr(self, '_terrain_cost_version', None) != self.tiles_version:
+            self._terrain_cost = np.where(
+                self.tiles['walkable'], 1 + self.tiles['weight'], 0
+            ).astype(np.int8)
+            self._terrain_cost_version = self.tiles_version
+
+        return self._terrain_cost
+
+    def get_hierarchical_graph(self) -> Optional[HierarchicalGraph]:
+        # None for maps too small to benefit from it
+        if self.area < hierarchical_pathfinding.MIN_AREA:
+            return None
+
+        if self.hierarchical_graph is None:
+            self.hierarchical_graph = HierarchicalGraph()
+        if self.hierarchical_graph.version != self.tiles_version:
+            self.hierarchical_graph.update(self.terrain_cost, self.tiles_version)
+
+        return self.hierarchical_graph
+
+    def get_path_cost(self) -> np.ndarray:
+        # terrain cost with blocking entities overlaid on top of it
+        # lower means more entity crowding behind each other
+        # higher incites them to take longer paths to surround player
+        cost = self.terrain_cost.copy()
+
+        occupied = (self.occupancy != 0) & (cost != 0)
+        cost[occupied] += (10 * self.occupancy[occupied]).astype(np.int8)
+
+        return cost
+
     @property
     def area(self):
         return self.width * self.height
     
+    # each property yields from a snapshot of the registry
+    # so it's safe to kill, pick up or drop entities while looping over them
     @property
     def objects(self) -> Iterator[Object]:
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Object)
-        )
+        yield from list(self._objects)
 
     @property
     def actors(self) -> Iterator[Actor]:
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        yield from list(self._living_actors)
 
     @property
-    def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+    def corpses(self) -> Iterator[Actor]:
+        yield from list(self._corpses)
 
-    # check list of entities and return one being at [x, y] location
-    def get_blocking_entity_at_location(self, location_x: int, location_y: int):
-        for entity in self.entities:
-            if (entity.blocks_movement and entity.x == location_x and entity.y == location_y):
+    @property
+    def items(self) -> Iterator[Item]:
+        yield from list(self._items)
+
+    def add_entity(self, entity: Entity) -> None:
+        # register entity on this map at its current position
+        if entity in self.entities:
+            self.remove_entity(entity)
+
+        location = (entity.x, entity.y)
+        self.location_of_entity[entity] = location
+        self.entities_by_location.setdefault(location, []).append(entity)
+
+        self.entities.add(entity)
+        self.entity_table.add(entity)
+        self.update_entity(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        # drop entity from the map and all of its lookups
+        self.entities.remove(entity)
+        self.entity_table.remove(entity)
+
+        if isinstance(entity, Actor):
+            self._living_actors.discard(entity)
+            self._corpses.discard(entity)
+        elif isinstance(entity, Item):
+            self._items.discard(entity)
+            self.items_version += 1
+        elif isinstance(entity, Object):
+            self._objects.discard(entity)
+
+        self.entities_version += 1
+
+        location = self.location_of_entity.pop(entity)
+        self.name_cache.pop(location, None)
+        if entity in self._blocking:
+            self._blocking.remove(entity)
+            self.occupancy[location] -= 1
+
+        entities_here = self.entities_by_location[location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self.entities_by_location[location]
+
+    def update_entity(self, entity: Entity) -> None:
+        # file entity under the registry matching its current state
+        # has to be called when it changes, like actor dying and becoming corpse
+        if isinstance(entity, Actor):
+            if entity.is_alive:
+                self._corpses.discard(entity)
+                self._living_actors.add(entity)
+            else:
+                self._living_actors.discard(entity)
+                self._corpses.add(entity)
+        elif isinstance(entity, Item) and entity not in self._items:
+            self._items.add(entity)
+            self.items_version += 1
+        elif isinstance(entity, Object):
+            self._objects.add(entity)
+
+        # blocks_movement flips off when actor dies
+        if entity.blocks_movement != (entity in self._blocking):
+            if entity.blocks_movement:
+                self._blocking.add(entity)
+                self.occupancy[self.location_of_entity[entity]] += 1
+            else:
+                self._blocking.remove(entity)
+                self.occupancy[self.location_of_entity[entity]] -= 1
+
+        self.entities_version += 1
+        self.entity_table.update(entity)
+        # covers add_entity too, which calls this once entity has its location
+        self.name_cache.pop(self.location_of_entity[entity], None)
+
+    def update_entity_location(self, entity: Entity) -> None:
+        # has to be called after entity x, y changed while it's on this map
+        old_location = self.location_of_entity[entity]
+        new_location = (entity.x, entity.y)
+
+        if old_location == new_location:
+            return
+
+        self.entity_table.move(entity)
+        self.entities_version += 1
+        self.name_cache.pop(old_location, None)
+        self.name_cache.pop(new_location, None)
+
+        if entity in self._blocking:
+            self.occupancy[old_location] -= 1
+            self.occupancy[new_location] += 1
+
+        entities_here = self.entities_by_location[old_location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self.entities_by_location[old_location]
+
+        self.location_of_entity[entity] = new_location
+        self.entities_by_location.setdefault(new_location, []).append(entity)
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        # everything standing on given tile, don't modify returned list
+        return self.entities_by_location.get((x, y), [])
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        # whether any entity blocking movement stands on [x, y]
+        return bool(self.occupancy[x, y])
+
+    # check entities on [x, y] location and return one blocking movement
+    def get_blocking_entity_at_location(self, location_x: int, location_y: int) -> Optional[Entity]:
+        if not self.occupancy[location_x, location_y]:
+            return None
+
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
 
         return None
-    
-    def get_object_at_location(self, x: int, y: int):
-        for object in self.objects:
-            if object.x == x and object.y == y:
-                return object
-        
+
+    def get_object_at_location(self, x: int, y: int) -> Optional[Object]:
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Object):
+                return entity
+
         return None
 
-    def get_actor_at_location(self, x: int, y: int):
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+    def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
@@ -100,6 +331,46 @@ class GameMap:
         # Return True if x and y are inside of the bounds of this map.
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def mark_fov_changed(self, window: Optional[Tuple[slice, slice]]) -> None:
+        # visible or explored changed within window, None for anywhere on the map
+        if window is None or len(self.fov_dirty) >= 16:
+            # too many changes without a frame in between, just redo whole view
+            self.viewport_key = None
+            self.fov_dirty = []
+        else:
+            self.fov_dirty.append(window)
+
+    def get_viewport_graphics(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+        # graphics of tiles in view, light for the ones seen now, dark for explored
+        # and SHROUD for the rest, only parts that changed since last frame are picked again
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        key = (x1, y1, x2, y2, self.tiles_version)
+
+        if self.viewport_cache is None or self.viewport_key != key:
+            # camera scrolled or tiles changed
+            self.viewport_cache = np.empty((x2 - x1, y2 - y1), dtype = tile_types.graphic_dt, order = 'F')
+            self.viewport_key = key
+            windows = [np.s_[x1:x2, y1:y2]]
+        else:
+            windows = self.fov_dirty
+        self.fov_dirty = []
+
+        for window_x, window_y in windows:
+            left, right = max(window_x.start, x1), min(window_x.stop, x2)
+            top, bottom = max(window_y.start, y1), min(window_y.stop, y2)
+            if left >= right or top >= bottom:
+                continue
+
+            area = np.s_[left:right, top:bottom]
+            raw = tile_types.graphic_raw_dt
+            self.viewport_cache[left - x1 : right - x1, top - y1 : bottom - y1].view(raw)[...] = np.where(
+                self.visible[area],
+                self.tiles['light'][area].view(raw),
+                np.where(self.explored[area], self.tiles['dark'][area].view(raw), tile_types.SHROUD_RAW)
+            )
+
+        return self.viewport_cache
+
     def render(self, console: Console) -> None:
         self.view_start_x = min(max(self.engine.player.x - int(self.engine.game_world.viewport_width / 2), 0), self.engine.game_world.map_width - self.engine.game_world.viewport_width)
         self.view_start_y = min(max(self.engine.player.y - int(self.engine.game_world.viewport_height / 2), 0), self.engine.game_world.map_height - self.engine.game_world.viewport_height)
@@ -118,9 +389,6 @@ class GameMap:
 
         # view_start_x:self.engine.game_world.viewport_width, view_start_y:self.engine.game_world.viewport_height used for all works
         # but creates static camera that doesn't follow player
-        viewport_tiles = self.tiles[self.view_start_x:view_end_x, self.view_start_y:view_end_y]  # [o_x:view_end_x+1,o_y:view_end_y + 1]
-        viewport_visible = self.visible[self.view_start_x:view_end_x, self.view_start_y:view_end_y]
-        viewport_explored = self.explored[self.view_start_x:view_end_x, self.view_start_y:view_end_y]
 
         # prints the whole map, its called from within Engine when we render every bit to console
         # print based on condition whether tiles are visible or were explored already
@@ -130,29 +398,42 @@ class GameMap:
             # display whole map without FOV function
             console.rgb[0 : self.width, 0 : self.height] = self.tiles['light']
         else:
-            console.rgb[0:self.engine.game_world.viewport_width, 0:self.engine.game_world.viewport_height] = np.select(
-                (viewport_visible, viewport_explored),
-                (viewport_tiles['light'], viewport_tiles['dark']),
-                tile_types.SHROUD
+            console.rgb[0:self.engine.game_world.viewport_width, 0:self.engine.game_world.viewport_height] = self.get_viewport_graphics(
+                self.view_start_x, self.view_start_y, view_end_x, view_end_y
             )
 
         self.engine.update_fov()
 
-        # sorted list of entities to render on gamemap, based on order value
-        entities_for_rendering = sorted(
-            self.entities, key = lambda x: x.render_order.value
-        )
+        self.render_entities(console)
+
+    def render_entities(self, console: Console) -> None:
+        # glyphs of all entities in view written into console at once
+        # layer by layer in render order, so actors end up on top of items and corpses
+        table = self.entity_table
+        size = table.size
+        x, y, layer = table.x[:size], table.y[:size], table.layer[:size]
 
-        for entity in entities_for_rendering:
+        if self.visibility:
             # don't apply FOV to entities
-            if self.visibility:
-                console.print(x = entity.x, y = entity.y, string = entity.char, fg = entity.color)
-            else:
-                # display entity only if in FOV
-                if self.visible[entity.x, entity.y]:
-                    console.print(
-                        x = entity.x - self.view_start_x, y = entity.y - self.view_start_y, string = entity.char, fg = entity.color
-                    )
+            screen_x, screen_y = x, y
+            shown = (layer >= 0) & (x < console.width) & (y < console.height)
+        else:
+            # display entity only if in view and FOV
+            screen_x, screen_y = x - self.view_start_x, y - self.view_start_y
+            shown = (
+                (layer >= 0)
+                & (screen_x >= 0) & (screen_x < self.engine.game_world.viewport_width)
+                & (screen_y >= 0) & (screen_y < self.engine.game_world.viewport_height)
+            )
+            shown[shown] = self.visible[x[shown], y[shown]]
+
+        shown &= table.ch[:size] != 0 # burnt out entities have no glyph
+
+        for order in sorted(RenderOrder, key = lambda order: order.value):
+            drawn = shown & (layer == order.value)
+            if drawn.any():
+                console.rgb['ch'][screen_x[drawn], screen_y[drawn]] = table.ch[:size][drawn]
+                console.rgb['fg'][screen_x[drawn], screen_y[drawn]] = table.fg[:size][drawn]
 
 class GameWorld:
     '''Holds settings for GameMap and generates new maps when dwelling deeper down'''
@@ -214,6 +495,7 @@ class GameWorld:
             )
             floor_to_descend = self.floors_list[self.current_floor + 1] # pickle.loads(lzma.decompress(self.floors_list[self.current_floor + 1]))
 
+            self.engine.game_map.clear_caches()
             self.engine.game_map = floor_to_descend
             self.engine.player.place(
                 self.engine.game_map.upstairs_location[0],
@@ -225,6 +507,7 @@ class GameWorld:
             self.current_floor += 1
         else:   
             floor_to_save = self.engine.game_map
+            floor_to_save.clear_caches()
 
             self.generate_floor()
             
@@ -254,6 +537,7 @@ class GameWorld:
 
             floor_to_ascend = self.floors_list[self.current_floor - 1] # pickle.loads(lzma.decompress(self.floors_list[self.current_floor - 1]))
 
+            self.engine.game_map.clear_caches()
             self.engine.game_map = floor_to_ascend
             self.engine.player.place(
                 self.engine.game_map.downstairs_location[0],
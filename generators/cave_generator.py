@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from random import randrange, seed
-from scipy import signal #type: ignore
 from scipy.ndimage import label, generate_binary_structure # type: ignore
 import numpy as np
 
+from generators.cellular_automata import CellularAutomata, threshold_rule
+
 EMPTY = -1
 WALL = 0
 FLOOR = 1
@@ -17,15 +18,6 @@ TILE_MAPPING = {
     TREE: '^'
 }
 
-# helper kernel for convolve2d, basically 2d array
-# kernel = [
-#     [0, 1, 0],
-#     [1, 0, 1],
-#     [0, 1, 0]
-# ]
-kernel = np.ones((3, 3), dtype="int")
-kernel[1, 1] = 0
-
 seed(1337)
 
 class caveGen:
@@ -33,7 +25,6 @@ class caveGen:
         self.__rows = rows
         self.__cols = cols
         self.__map = np.full((rows, cols), fill_value = WALL, order='F')
-        self.__map_new = self.__map.copy()
         self.__number_of_iterations = number_of_iterations
         self.__pre_genenerate_map(initial_open)
 
@@ -67,15 +58,12 @@ class caveGen:
     def __get_row_as_string(self, row):
         return ' '.join((TILE_MAPPING[cell] for cell in row))
 
-    def gen_map(self, min, max):
-        self.__map_new = signal.convolve2d(self.__map, kernel, mode = "same", boundary = 'wrap')
-
-        for r in range(1, self.__rows - 1):
-            for c in range(1, self.__cols - 1):
-                if self.__map_new[r, c] > max:
-                    self.__map[r, c] = FLOOR
-                elif self.__map_new[r, c] < min:
-                    self.__map[r, c] = WALL
+    def gen_map(self, min, max, passes = 1):
+        # cells with more than max floor neighbours turn to FLOOR, less than min to WALL
+        # cells on the edges stay as they are
+        automata = CellularAutomata(self.__map == FLOOR, keep_edges = True)
+        automata.run(threshold_rule(max, min), passes)
+        self.__map[...] = np.where(automata.cells, FLOOR, WALL)
 
         return self.__map
 
@@ -103,9 +91,8 @@ class caveGen:
         # it tends to create central "hub" like big space with corridors out of it and smaller pockets near edges
         # overall it makes more open caves, running just 4, 5 makes tighter caves
         # but also more closed off little pockets
-        for _ in range(self.__number_of_iterations):
-            # self.gen_map(3, 4)
-            self.gen_map(4, 5)
+        # self.gen_map(3, 4, self.__number_of_iterations)
+        self.gen_map(4, 5, self.__number_of_iterations)
 
     def label_array(self):
         s = generate_binary_structure(2,2)
@@ -126,6 +113,7 @@ def validate_input(prompt):
         else:
             print('Input must be positive and bigger than 5, try again')
 
+# run from the source folder with `python -m generators.cave_generator`
 if __name__ == '__main__':
     length = validate_input("Enter the # of rows: ")
     width = validate_input("Enter the # of columns: ")
@@ -1,18 +1,116 @@
+'''Cellular automata over grid of open (floor) and closed (wall) cells
+
+Cells live in uint8 grid padded with closed border, next generation is written into
+second grid of the same size and the two get swapped, so passes don't allocate anything.
+Rules are given in B/S notation, 'B5678/S345678' opens closed cell with 5 to 8 open
+neighbours and keeps open cell with 3 to 8 of them, anything else closes.
+Tiles are read once when loading and written once in write_back.
+'''
 from __future__ import annotations
 
-from game_map import GameMap
-from scipy import signal # type: ignore
-from typing import Any
+from functools import lru_cache
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+from scipy import ndimage # type: ignore
+
 import tile_types
 
-def cellular_automata(dungeon: GameMap, wall_rule: int, count: Any) -> GameMap:
-    # on each pass we recalculate amount of neighbors, which gives much smoother output
-    # more passes equals smoother map and less artifacts
-    # we check the number of neighbors including tile itself is less/more than wall_rule
-    # and let it "die" or not
-    count = signal.convolve2d(dungeon.tiles['weight'], [[1, 1, 1], [1, 1, 1], [1, 1, 1]], mode = 'same')
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+@lru_cache(maxsize = None)
+def parse_rule(rule: str) -> np.ndarray:
+    # lookup table of next state, indexed by number of open neighbours
+    # plus 10 for cells that are open now
+    match = re.fullmatch(r'B([0-8]*)/S([0-8]*)', rule.upper())
+    if match is None:
+        raise ValueError(f'Rule {rule!r} is not in B/S notation, like B5678/S345678')
+
+    table = np.zeros(19, dtype = np.uint8)
+    table[[int(n) for n in match[1]]] = 1
+    table[[10 + int(n) for n in match[2]]] = 1
+    table.flags.writeable = False
+    return table
+
+def threshold_rule(open_above: int, close_below: int) -> str:
+    # closed cells open with more than open_above open neighbours,
+    # open cells close with less than close_below of them
+    birth = ''.join(str(n) for n in range(open_above + 1, 9))
+    survival = ''.join(str(n) for n in range(max(close_below, 0), 9))
+    return f'B{birth}/S{survival}'
+
+def wall_rule(wall_rule: int) -> str:
+    # rule of the old procgen pass, which counted floor in 3x3 square including the tile itself
+    # and made wall below wall_rule, floor above it and left tile alone when equal to it
+    return threshold_rule(wall_rule, wall_rule - 1)
+
+class CellularAutomata:
+    def __init__(self, cells: np.ndarray, keep_edges: bool = False, separable: bool = True):
+        width, height = cells.shape
+        # current and next generation, with border of closed cells around
+        self._grid = np.zeros((width + 2, height + 2), dtype = np.uint8, order = 'F')
+        self._next = np.zeros_like(self._grid)
+        # neighbour counts, first summed along x and then along y
+        self._rows = np.empty((width, height + 2), dtype = np.uint8, order = 'F')
+        self._count = np.empty((width, height), dtype = np.uint8, order = 'F')
+        self._initial = np.empty((width, height), dtype = bool, order = 'F')
+        # cells on the edge of the grid never change
+        self.keep_edges = keep_edges
+        # count neighbours with two 1d sums instead of 3x3 correlation
+        self.separable = separable
+
+        self.load(cells)
+
+    @property
+    def cells(self) -> np.ndarray:
+        # current generation, 1 for open cell, without the border
+        return self._grid[1:-1, 1:-1]
+
+    def load(self, cells: np.ndarray) -> None:
+        # start over from given grid, anything non zero is open
+        np.not_equal(cells, 0, out = self._initial)
+        self.cells[...] = self._initial
+
+    def _count_neighbours(self) -> np.ndarray:
+        # open cells in 3x3 square around each cell, including the cell itself
+        grid = self._grid
+        if self.separable:
+            np.add(grid[:-2], grid[1:-1], out = self._rows)
+            self._rows += grid[2:]
+            np.add(self._rows[:, :-2], self._rows[:, 1:-1], out = self._count)
+            self._count += self._rows[:, 2:]
+        else:
+            ndimage.correlate(self.cells, np.ones((3, 3), dtype = np.uint8), output = self._count, mode = 'constant')
+
+        return self._count
+
+    def step(self, rule: str) -> None:
+        table = parse_rule(rule)
+        cells = self.cells
+        count = self._count_neighbours()
+
+        # square includes the cell, open cells go to 10 + neighbours and closed ones stay at neighbours
+        following = self._next[1:-1, 1:-1]
+        np.multiply(cells, 9, out = following)
+        count += following
+        np.take(table, count, out = following, mode = 'clip')
+
+        if self.keep_edges:
+            following[[0, -1], :] = cells[[0, -1], :]
+            following[:, [0, -1]] = cells[:, [0, -1]]
+
+        self._grid, self._next = self._next, self._grid
 
-    dungeon.tiles[count < wall_rule] = tile_types.wall
-    dungeon.tiles[count > wall_rule] = tile_types.floor
+    def run(self, rule: str, passes: int) -> None:
+        for _ in range(passes):
+            self.step(rule)
 
-    return dungeon
\ No newline at end of file
+    def write_back(self, dungeon: GameMap) -> None:
+        # floor and wall where cells changed since loading, everything else keeps its tile
+        cells = self.cells
+        changed = cells != self._initial
+        if changed.any():
+            dungeon.tiles[changed] = np.where(cells[changed], tile_types.floor, tile_types.wall)
+        self._initial[...] = cells
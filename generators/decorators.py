@@ -2,71 +2,85 @@ from __future__ import annotations
 from game_map import GameMap
 import tile_types
 
+from typing import Sequence
+
 import numpy as np
 
 from helpers.rng import nprng
+from helpers import carving
+
+# chance bands of add_features, for each kind of feature tiles picked when chance is
+# under the bound, going from the lowest one
+# dense grass was given for chance under .2 after missing .5, so it never shows up
+FEATURES = (
+    ((.10, .5), (tile_types.loose_grass, tile_types.grass)),
+    ((.10, .5), (tile_types.loose_rubble, tile_types.rubble)),
+    ((.5, 1.), (tile_types.stalactite, tile_types.stalagmite)),
+    # aquifers, left out for now
+    ((), ()),
+)
+
+def pick_tiles(chance: np.ndarray, bounds: Sequence[float], tiles: Sequence[np.ndarray]) -> np.ndarray:
+    # id of the tile for the first bound each chance is under, -1 for chances above all of them
+    band = np.searchsorted(np.asarray(bounds, dtype = float), chance, side = 'right')
+    table = np.array([tile['id'] for tile in tiles] + [-1], dtype = np.int16)
+    return table[band]
+
+def scatter_tiles(dungeon: GameMap, x: np.ndarray, y: np.ndarray, ids: np.ndarray) -> None:
+    # write tiles picked in order, in one go
+    # -1 leaves tile as it was, when tile is picked more than once the last one stays
+    picked = ids >= 0
+    x, y, ids = x[picked], y[picked], ids[picked]
+
+    cell = np.ravel_multi_index((x, y), dungeon.tiles.shape)
+    _, last = np.unique(cell[::-1], return_index = True)
+    last = len(cell) - 1 - last
+
+    dungeon.tiles[x[last], y[last]] = tile_types.tile_table()[ids[last]]
 
 def add_features(dungeon: GameMap) -> GameMap:
     x, y = np.where(dungeon.tiles['walkable'])
+    if not len(x):
+        return dungeon
+
+    # as many random tiles as there are walkable ones, each getting random feature
+    j = nprng.integers(len(x), size = len(x))
+    feature = nprng.choice(len(FEATURES), size = len(x))
+    chance = nprng.random(len(x))
 
-    for _ in range(len(x)):
-        j = nprng.integers(len(x))
-
-        feature = nprng.choice(4)
-        chance = nprng.random()
-
-        if feature == 0:
-            if chance < .10:
-                dungeon.tiles[x[j], y[j]] = tile_types.loose_grass
-            elif chance < .5:
-                dungeon.tiles[x[j], y[j]] = tile_types.grass
-            elif chance < .2:
-                dungeon.tiles[x[j], y[j]] = tile_types.dense_grass
-        elif feature == 1:
-            if chance < .10:
-                dungeon.tiles[x[j], y[j]] = tile_types.loose_rubble
-            elif chance < .5:
-                dungeon.tiles[x[j], y[j]] = tile_types.rubble
-        elif feature == 2:
-            if chance < .5:
-                dungeon.tiles[x[j], y[j]] = tile_types.stalactite
-            elif chance > .5:
-                dungeon.tiles[x[j], y[j]] = tile_types.stalagmite
-        # elif feature == 3:
-        #     print(f'\n\nAdding single water spot...\n\n')
-        #     add_aquifers(x[j], y[j], dungeon)
+    ids = np.full(len(x), -1, dtype = np.int16)
+    for kind, (bounds, tiles) in enumerate(FEATURES):
+        chosen = feature == kind
+        ids[chosen] = pick_tiles(chance[chosen], bounds, tiles)
+
+    scatter_tiles(dungeon, x[j], y[j], ids)
 
     return dungeon
 
 def add_aquifers(x: np.NDArray[np.intp], y: np.NDArray[np.intp], dungeon: GameMap):
     chance = nprng.random()
 
-    dungeon.tiles[x, y] = tile_types.deep_water
-    dungeon.tiles[[x-1,x+1], y-1:y+2] = tile_types.deep_water
-    dungeon.tiles[x, [y-1,y+1]] = tile_types.deep_water
+    # 3x3 pool of deep water
+    carving.carve(dungeon, tile_types.deep_water, carving.discs([(x, y)], 1.5))
 
     if chance < .5:
         # shallow aquifer
         dungeon.tiles[x, y] = tile_types.shallow_water
-    elif chance > .5:
-        dungeon.tiles[x, y] = tile_types.deep_water
-        # deep aquifer
+    # otherwise deep aquifer, center stays deep
 
     return
 
 def add_grass_features(dungeon: GameMap) -> GameMap:
     # Implement logic to add stalagmites and stalactites to the cave map
     x, y = np.where(dungeon.tiles['walkable'])
-    
-    for _ in range(len(x)):
-        j = nprng.integers(len(x))
-        chance = nprng.integers(0, 100)
-        if chance <= 10:
-            dungeon.tiles[x[j], y[j]] = tile_types.loose_grass
-        elif 10 <= chance <= 15:
-            dungeon.tiles[x[j], y[j]] = tile_types.grass
-        elif 10 <= chance <= 11:
-            dungeon.tiles[x[j], y[j]] = tile_types.dense_grass
+    if not len(x):
+        return dungeon
+
+    j = nprng.integers(len(x), size = len(x))
+    chance = nprng.integers(0, 100, size = len(x))
+    # 0-10 loose grass, 11-15 grass, dense grass (10-11) was never reached
+    ids = pick_tiles(chance, (11, 16), (tile_types.loose_grass, tile_types.grass))
+    scatter_tiles(dungeon, x[j], y[j], ids)
 
     return dungeon
 
@@ -77,27 +91,27 @@ def add_water_features(dungeon: GameMap):
 def add_rubble_and_details(dungeon: GameMap):
     # Implement logic to add random rock rubble, debris, or other atmospheric details
     x, y = np.where(dungeon.tiles['walkable'])
-    
-    for _ in range(len(x)):
-        j = nprng.integers(len(x))
-        chance = nprng.integers(0, 100)
-        if 10 <= chance <= 15:
-            dungeon.tiles[x[j], y[j]] = tile_types.loose_rubble
-        elif chance <= 10:
-            dungeon.tiles[x[j], y[j]] = tile_types.rubble
+    if not len(x):
+        return dungeon
+
+    j = nprng.integers(len(x), size = len(x))
+    chance = nprng.integers(0, 100, size = len(x))
+    # 0-9 rubble, 10-15 loose rubble
+    ids = pick_tiles(chance, (10, 16), (tile_types.rubble, tile_types.loose_rubble))
+    scatter_tiles(dungeon, x[j], y[j], ids)
 
     return dungeon
 
 def add_rock_features(dungeon: GameMap):
     # Implement logic to add random rock rubble, debris, or other atmospheric details
     x, y = np.where(dungeon.tiles['walkable'])
-    
-    for _ in range(len(x)):
-        j = nprng.integers(len(x))
-        chance = nprng.integers(0, 100)
-        if chance <= 1:
-            dungeon.tiles[x[j], y[j]] = tile_types.stalactite
-        elif chance <= 5:
-            dungeon.tiles[x[j], y[j]] = tile_types.stalagmite
-
-    return dungeon
\ No newline at end of file
+    if not len(x):
+        return dungeon
+
+    j = nprng.integers(len(x), size = len(x))
+    chance = nprng.integers(0, 100, size = len(x))
+    # 0-1 stalactite, 2-5 stalagmite
+    ids = pick_tiles(chance, (2, 6), (tile_types.stalactite, tile_types.stalagmite))
+    scatter_tiles(dungeon, x[j], y[j], ids)
+
+    return dungeon
@@ -6,7 +6,8 @@ import tile_types
 
 from numpy.random import Generator 
 
-from helpers.diggers import tunnel_between, drunken_walk
+from helpers.diggers import tunnels_between, drunken_walk
+from helpers import carving
 
 class RectangularRoom:
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -39,10 +40,9 @@ class RectangularRoom:
 
 def room_digout(room: RectangularRoom, dungeon: GameMap):
     # surrounding walls
-    dungeon.tiles[[room.x1, room.x2], room.y1:room.y2 + 1] = tile_types.wall
-    dungeon.tiles[room.x1:room.x2 + 1, [room.y1, room.y2]] = tile_types.wall
+    carving.carve(dungeon, tile_types.wall, carving.outlines([(room.x1, room.y1, room.x2 + 1, room.y2 + 1)]))
     # inside of the room
-    dungeon.tiles[room.inner] = tile_types.floor
+    carving.carve(dungeon, tile_types.floor, carving.rectangles([(room.x1 + 1, room.y1 + 1, room.x2, room.y2)]))
 
 def create_room(min_size: int, max_size: int, dungeon: GameMap, rand_generator: Generator):
     room_w, room_h = rand_generator.integers(min_size, max_size), rand_generator.integers(min_size, max_size)
@@ -103,8 +103,7 @@ def generate_rooms(
         
         room_digout(new_room, dungeon)
 
-        for x, y in tunnel_between(prev_room.center, new_room.center, rand_generator):
-            dungeon.tiles[x, y] = tile_types.floor
+        carving.carve(dungeon, tile_types.floor, tunnels_between([prev_room.center], [new_room.center], rand_generator))
 
         rooms.append(new_room)
 
@@ -0,0 +1,105 @@
+'''Carving shapes into map tiles in batches
+
+Each function takes whole batch of shapes (corridors, rectangles, outlines or discs) and turns it into pair of index arrays (x, y),
+carve() then writes any number of such batches to the map in one assignment,
+instead of going over shapes and their tiles one by one in python.
+'''
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from game_map import GameMap
+
+Points = Tuple[np.ndarray, np.ndarray]
+
+def _ragged_range(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # 0..count-1 for each count joined together, with index of the count each number came from
+    counts = np.asarray(counts, dtype = np.intp)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) - starts[owner], owner
+
+def _boxes(rects: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # every tile of [x1, x2) x [y1, y2) boxes, with index of the box it belongs to
+    x1, y1, x2, y2 = rects.T
+    width = np.maximum(x2 - x1, 0)
+    height = np.maximum(y2 - y1, 0)
+    k, owner = _ragged_range(width * height)
+    # height is never 0 for box that has any tiles
+    h = height[owner]
+    return x1[owner] + k // h, y1[owner] + k % h, owner
+
+def _as_rects(rects: Sequence[Tuple[int, int, int, int]]) -> np.ndarray:
+    return np.asarray(rects, dtype = np.intp).reshape(-1, 4)
+
+def _straight(x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray) -> Points:
+    # horizontal or vertical lines without their ends, same tiles bresenham would give
+    dx, dy = x2 - x1, y2 - y1
+    k, owner = _ragged_range(np.maximum(np.maximum(abs(dx), abs(dy)) - 1, 0))
+    k += 1
+    return x1[owner] + np.sign(dx)[owner] * k, y1[owner] + np.sign(dy)[owner] * k
+
+def corridors(
+    starts: Sequence[Tuple[int, int]],
+    ends: Sequence[Tuple[int, int]],
+    horizontal_first: npt.ArrayLike,
+    endpoints: bool = False,
+) -> Points:
+    # L shaped corridors, going along one axis and then the other
+    # the ends and the corner itself are left out unless endpoints is set,
+    # without them the two legs only touch diagonally
+    x1, y1 = np.asarray(starts, dtype = np.intp).reshape(-1, 2).T
+    x2, y2 = np.asarray(ends, dtype = np.intp).reshape(-1, 2).T
+    horizontal: np.ndarray = np.asarray(horizontal_first, dtype = bool)
+
+    corner_x = np.where(horizontal, x2, x1)
+    corner_y = np.where(horizontal, y1, y2)
+
+    first = _straight(x1, y1, corner_x, corner_y)
+    second = _straight(corner_x, corner_y, x2, y2)
+    if not endpoints:
+        return np.concatenate((first[0], second[0])), np.concatenate((first[1], second[1]))
+
+    return (
+        np.concatenate((x1, first[0], corner_x, second[0], x2)),
+        np.concatenate((y1, first[1], corner_y, second[1], y2)),
+    )
+
+def rectangles(rects: Sequence[Tuple[int, int, int, int]]) -> Points:
+    # filled [x1, x2) x [y1, y2) rectangles
+    x, y, _ = _boxes(_as_rects(rects))
+    return x, y
+
+def outlines(rects: Sequence[Tuple[int, int, int, int]]) -> Points:
+    # only the border tiles of [x1, x2) x [y1, y2) rectangles
+    bounds = _as_rects(rects)
+    x, y, owner = _boxes(bounds)
+    x1, y1, x2, y2 = bounds[owner].T
+    edge = (x == x1) | (x == x2 - 1) | (y == y1) | (y == y2 - 1)
+    return x[edge], y[edge]
+
+def discs(centers: Sequence[Tuple[int, int]], radii: npt.ArrayLike) -> Points:
+    # tiles within euclidean radius from center, radius 0 being just the center
+    # and 1.5 the whole 3x3 square around it
+    cx, cy = np.asarray(centers, dtype = np.intp).reshape(-1, 2).T
+    radius: np.ndarray = np.broadcast_to(np.asarray(radii, dtype = float), cx.shape)
+    reach = radius.astype(np.intp)
+    x, y, owner = _boxes(np.stack((cx - reach, cy - reach, cx + reach + 1, cy + reach + 1), axis = 1))
+    inside = (x - cx[owner]) ** 2 + (y - cy[owner]) ** 2 <= radius[owner] ** 2
+    return x[inside], y[inside]
+
+def carve(dungeon: GameMap, tile: np.ndarray, *shapes: Points) -> None:
+    # write tile over every point of given batches at once
+    # points outside of the map are dropped, instead of wrapping around with negative indices
+    if not shapes:
+        return
+    x = np.concatenate([shape[0] for shape in shapes])
+    y = np.concatenate([shape[1] for shape in shapes])
+    inside = (x >= 0) & (x < dungeon.width) & (y >= 0) & (y < dungeon.height)
+    if not inside.all():
+        x, y = x[inside], y[inside]
+    if len(x):
+        dungeon.tiles[x, y] = tile
@@ -1,27 +1,22 @@
 from __future__ import annotations
 
-from tcod import los
 from game_map import GameMap
+from helpers import carving
 
-from typing import Tuple, Iterator
+from typing import Sequence, Tuple, Iterator
 from numpy.random import Generator
 
-def tunnel_between(start: Tuple[int, int], end: Tuple[int, int], rand_generator: Generator) -> Iterator[Tuple[int, int]]:
-    # return L shaped tunnel between two points
-    x1, y1 = start
-    target_x, target_y = end
-
-    if rand_generator.random() < 0.5:
-        # go horizontal, then vertical
-        corner_x, corner_y = target_x, y1
-    else:
-        # go vertical, then horizontal
-        corner_x, corner_y = x1, target_y
-
-    for x, y in los.bresenham((x1, y1), (corner_x, corner_y))[1:-1].tolist():
-        yield x, y
-    for x, y in los.bresenham((corner_x, corner_y), (target_x, target_y))[1:-1].tolist():
-        yield x, y
+def tunnels_between(
+    starts: Sequence[Tuple[int, int]],
+    ends: Sequence[Tuple[int, int]],
+    rand_generator: Generator,
+    endpoints: bool = False,
+) -> carving.Points:
+    # L shaped tunnels between pairs of points, as index arrays ready for carving
+    # each tunnel picks its own way around the corner, horizontal first half of the time
+    # endpoints adds both ends and the corner, so the tunnel is walkable without going diagonally
+    horizontal_first = rand_generator.random(len(starts)) < 0.5
+    return carving.corridors(starts, ends, horizontal_first, endpoints = endpoints)
 
 def drunken_walk(start: Tuple[int, int], end: Tuple[int, int], dungeon: GameMap, rand_generator: Generator) -> Iterator[Tuple[int, int]]:
     x, y = start
@@ -1,31 +1,69 @@
 from __future__ import annotations
 
-from typing import List, Set, Tuple, cast
+from typing import List, Tuple
 import numpy as np
+from scipy import ndimage # type: ignore
 
 from game_map import GameMap
 import tile_types
 
-from helpers.diggers import tunnel_between
+from helpers.diggers import tunnels_between
+from helpers import carving
 
 from numpy.random import Generator
 
-def connect_regions(dungeon: GameMap, rand_generator: Generator):
-    # We can identify the different regions of the dungeon by flood-filling the floor tiles
-    regions = get_regions(dungeon.tiles["walkable"])
+class Regions:
+    '''Separate areas of walkable tiles, found with single connected component labelling pass'''
+
+    def __init__(self, walkable: np.ndarray):
+        # 0 for walls, number of the region for floor starting from 1
+        # regions are numbered in order of their first tile going column by column
+        # same as the flood fill used to find them
+        self.labels, self.count = ndimage.label(walkable)
+
+        x, y = np.nonzero(self.labels)
+        region = self.labels[x, y] - 1
+
+        # number of tiles, center (rounded down) and bounding box [x1, y1, x2, y2) of each region
+        self.sizes = np.bincount(region, minlength = self.count)
+        self.centers = np.stack((
+            np.bincount(region, weights = x, minlength = self.count) // self.sizes,
+            np.bincount(region, weights = y, minlength = self.count) // self.sizes,
+        ), axis = 1).astype(int)
+        self.bounds = np.array(
+            [(xs.start, ys.start, xs.stop, ys.stop) for xs, ys in ndimage.find_objects(self.labels)], dtype = int
+        ).reshape(-1, 4)
+
+    def __len__(self) -> int:
+        return self.count
+
+def connect_regions(dungeon: GameMap, rand_generator: Generator, mode: str = 'centers'):
+    # We can identify the different regions of the dungeon by labelling connected floor tiles
+    regions = Regions(dungeon.tiles["walkable"])
 
     # If there is only one region, there is no need to connect anything
     if len(regions) < 2:
         return
 
     # Otherwise, we need to connect the regions
-    # We can do this by finding the closest pair of points between regions and carving a tunnel between them
-    closest_points = get_closest_points_between_regions(regions)
-    for pair in closest_points:
-        for x, y in tunnel_between(pair[0], pair[1], rand_generator):
-            dungeon.tiles[x, y] = tile_types.floor
-            dungeon.tiles[x + 1, y + 1] = tile_types.floor
-        closest_points.pop(0)
+    if mode == 'mst':
+        # cheapest set of tunnels that joins all regions, between closest edges of regions
+        pairs = get_spanning_tree_points(regions)
+    else:
+        # We can do this by finding the closest pair of points between regions and carving a tunnel between them
+        closest_points = get_closest_points_between_regions(regions)
+        pairs = []
+        for pair in closest_points:
+            pairs.append(pair)
+            closest_points.pop(0)
+
+    # carve all of them at once, whole and two tiles wide
+    # the second tile stays off the outer wall
+    if pairs:
+        starts, ends = zip(*pairs)
+        x, y = tunnels_between(starts, ends, rand_generator, endpoints = True)
+        inner = (x + 1 < dungeon.width - 1) & (y + 1 < dungeon.height - 1)
+        carving.carve(dungeon, tile_types.floor, (x, y), (x[inner] + 1, y[inner] + 1))
     # center_point = (40, 20)n
     # points = get_center_points(regions)
     # for _ in points:
@@ -35,72 +73,66 @@ def connect_regions(dungeon: GameMap, rand_generator: Generator):
     #     points.pop(0)
 
 
-def get_regions(walkable: np.ndarray) -> List[Set[Tuple[int, int]]]:
-    regions = []
-    visited: Set[Tuple[int, int]] = set()
-
-    for x in range(walkable.shape[0]):
-        for y in range(walkable.shape[1]):
-            if (x, y) in visited or not walkable[x, y]:
-                continue
-
-            new_region: Set[Tuple[int, int]] = set()
-            queue = [(x, y)]
-
-            while queue:
-                current = queue.pop(0)
-
-                if current in visited or not walkable[current]:
-                    continue
-
-                new_region.add(current)
-                visited.add(current)
-
-                neighbours = [
-                    (current[0] - 1, current[1]),
-                    (current[0] + 1, current[1]),
-                    (current[0], current[1] - 1),
-                    (current[0], current[1] + 1),
-                ]
-
-                for neighbour in neighbours:
-                    if neighbour not in visited and walkable[neighbour]:
-                        queue.append(neighbour)
-
-            if new_region:
-                regions.append(new_region)
-
-    return regions
-
-
-def get_closest_points_between_regions(
-    regions: List[Set[Tuple[int, int]]]
-) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-    # pre compute the region centers to avoid unnecessary recalculations
-    region_centers = compute_region_centers(regions)
-    points = [(center, min(region_centers, key=lambda p: distance(center, p))) for center in region_centers]
-
-    return [
-        (p1, p2)
-        for p1, p2, _ in sorted(
-            [
-                (p1, p2, distance(p1, p2))
-                for i, (p1, d1) in enumerate(points)
-                for j, (p2, d2) in enumerate(points)
-                if i < j
-            ],
-            key=lambda t: t[2],
-        )
-    ]
-    # return [(p1, p2) for i, (p1, d1) in enumerate(points) for j, (p2, d2) in enumerate(points) if i < j and d1 == d2]
-
-def compute_region_centers(regions: List[Set[Tuple[int, int]]]) -> List[Tuple[int, int]]:
-    return cast(List[Tuple[int, int]], [tuple(map(lambda x: sum(x) // len(x), zip(*region))) for region in regions])
-
-def distance_to_region(
-    point_1: Tuple[int, int], regions: List[Set[Tuple[int, int]]]
-) -> float:
-    return min(distance(point_1, q) for region in regions for q in region)
-
-def distance(point_1: Tuple[int, int], point_2: Tuple[int, int]) -> float:
-    return (point_1[0] - point_2[0]) ** 2 + (point_1[1] - point_2[1]) ** 2
\ No newline at end of file
+def get_closest_points_between_regions(regions: Regions) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # every pair of region centers, closest first
+    centers = regions.centers
+    first, second = np.triu_indices(len(centers), k = 1)
+    distances = ((centers[first] - centers[second]) ** 2).sum(axis = 1)
+
+    # stable sort keeps pairs at equal distance in order they were paired up
+    order = np.argsort(distances, kind = 'stable')
+    points = [(int(x), int(y)) for x, y in centers]
+
+    return [(points[i], points[j]) for i, j in zip(first[order], second[order])]
+
+def get_spanning_tree_points(regions: Regions) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # pairs of floor tiles on edges of two regions, one for each of len(regions) - 1 tunnels
+    # that connect all regions with shortest total length (minimum spanning tree)
+
+    # every tile of the map gets its nearest floor tile, and so region it's closest to
+    # where tiles next to each other are closest to different regions, these regions are neighbours
+    # and nearest floor tiles of both are candidates for tunnel ends
+    _, (nearest_x, nearest_y) = ndimage.distance_transform_edt(regions.labels == 0, return_indices = True)
+    owner = regions.labels[nearest_x, nearest_y]
+
+    first, second, start_x, start_y, end_x, end_y = [], [], [], [], [], []
+    for side, other_side in ((np.s_[:-1, :], np.s_[1:, :]), (np.s_[:, :-1], np.s_[:, 1:])):
+        border = owner[side] != owner[other_side]
+        first.append(owner[side][border])
+        second.append(owner[other_side][border])
+        start_x.append(nearest_x[side][border])
+        start_y.append(nearest_y[side][border])
+        end_x.append(nearest_x[other_side][border])
+        end_y.append(nearest_y[other_side][border])
+
+    first_region, second_region = np.concatenate(first), np.concatenate(second)
+    x1, y1, x2, y2 = (np.concatenate(values) for values in (start_x, start_y, end_x, end_y))
+    distances = (x1 - x2) ** 2 + (y1 - y2) ** 2
+
+    # keep only the shortest candidate for each pair of regions, shortest pairs first
+    pair = np.minimum(first_region, second_region) * (len(regions) + 1) + np.maximum(first_region, second_region)
+    order = np.lexsort((distances, pair))
+    _, first_of_pair = np.unique(pair[order], return_index = True)
+    candidates = order[first_of_pair]
+    candidates = candidates[np.argsort(distances[candidates], kind = 'stable')]
+
+    # Kruskal, take candidates from shortest as long as they join regions not yet connected
+    parent = list(range(len(regions) + 1))
+
+    def find(region: int) -> int:
+        while parent[region] != region:
+            parent[region] = parent[parent[region]]
+            region = parent[region]
+        return region
+
+    points = []
+    for i in candidates.tolist():
+        a, b = find(int(first_region[i])), find(int(second_region[i]))
+        if a == b:
+            continue
+        parent[a] = b
+        points.append(((int(x1[i]), int(y1[i])), (int(x2[i]), int(y2[i]))))
+        if len(points) == len(regions) - 1:
+            break
+
+    return points
@@ -0,0 +1,286 @@
+'''Hierarchical pathfinding (HPA*) for big maps
+
+Map is split into square clusters. Walkable openings on the border between two clusters
+become entrances, including diagonal steps over the border and over the corner where four
+clusters meet, costs of walking between entrances inside each cluster are precomputed.
+Long paths are searched on that small graph of entrances first and then refined
+with short windowed searches between consecutive entrances.
+'''
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+import tcod
+
+from pathfinding import CARDINAL, DIAGONAL, find_path
+
+CLUSTER_SIZE = 16
+# smaller maps (width * height) are always searched directly
+MIN_AREA = 128 * 128
+# so are paths between points closer than this
+MIN_DISTANCE = 2 * CLUSTER_SIZE
+
+Node = Tuple[int, int]
+Cluster = Tuple[int, int]
+
+def octile(a: Node, b: Node) -> int:
+    # cheapest possible cost between two tiles, used as A* heuristic
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return DIAGONAL * min(dx, dy) + CARDINAL * abs(dx - dy)
+
+class HierarchicalGraph:
+    def __init__(self, cluster_size: int = CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        # terrain cost the graph was built from and its tiles version
+        self.cost: Optional[np.ndarray] = None
+        self.version: Optional[Hashable] = None
+
+        # entrance pairs (one tile on each side) of border between two neighbouring clusters,
+        # diagonal neighbours share just the corner
+        self.borders: Dict[Tuple[Cluster, Cluster], List[Tuple[Node, Node]]] = {}
+        # stepping over the border, entrance -> {entrance on the other side: cost}
+        self.crossings: Dict[Node, Dict[Node, int]] = {}
+        # walking inside cluster, cluster -> {entrance: {other entrance: cost}}
+        self.inner: Dict[Cluster, Dict[Node, Dict[Node, int]]] = {}
+
+    def __getstate__(self) -> dict:
+        # not worth saving, gets rebuilt on first long search after loading
+        return HierarchicalGraph(self.cluster_size).__dict__
+
+    @property
+    def clusters_shape(self) -> Tuple[int, int]:
+        width, height = self.cost.shape # type: ignore
+        return -(-width // self.cluster_size), -(-height // self.cluster_size)
+
+    def cluster_of(self, node: Node) -> Cluster:
+        return node[0] // self.cluster_size, node[1] // self.cluster_size
+
+    def neighbours_of(self, cluster: Cluster) -> List[Cluster]:
+        # clusters around, diagonal ones included
+        columns, rows = self.clusters_shape
+        cx, cy = cluster
+        return [
+            (cx + dx, cy + dy)
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if (dx or dy) and 0 <= cx + dx < columns and 0 <= cy + dy < rows
+        ]
+
+    def cluster_bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        width, height = self.cost.shape # type: ignore
+        x1, y1 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return x1, y1, min(x1 + self.cluster_size, width), min(y1 + self.cluster_size, height)
+
+    def update(self, cost: np.ndarray, version: Hashable) -> None:
+        # bring graph up to date with terrain cost, rebuilding only clusters that changed
+        if self.cost is not None and self.cost.shape == cost.shape:
+            changed = self.changed_clusters(cost)
+        else:
+            self.cost = None
+            self.borders.clear()
+            self.crossings.clear()
+            self.inner.clear()
+            changed = None
+
+        self.cost = cost.copy()
+        self.version = version
+
+        columns, rows = self.clusters_shape
+        if changed is None:
+            changed = {(cx, cy) for cx in range(columns) for cy in range(rows)}
+
+        # entrances on borders of changed cluster move, so do inner costs of its neighbours
+        borders: Set[Tuple[Cluster, Cluster]] = set()
+        clusters: Set[Cluster] = set(changed)
+        for cluster in changed:
+            for other in self.neighbours_of(cluster):
+                borders.add((cluster, other) if cluster < other else (other, cluster))
+                clusters.add(other)
+
+        for border in borders:
+            self.build_border(border)
+        for cluster in clusters:
+            self.build_cluster(cluster)
+
+    def changed_clusters(self, cost: np.ndarray) -> Set[Cluster]:
+        # compare with previous cost cluster by cluster in one go
+        size = self.cluster_size
+        columns, rows = self.clusters_shape
+
+        difference = np.zeros((columns * size, rows * size), dtype = bool)
+        difference[: cost.shape[0], : cost.shape[1]] = cost != self.cost
+        difference = difference.reshape(columns, size, rows, size).any(axis = (1, 3))
+
+        return {(int(cx), int(cy)) for cx, cy in zip(*np.nonzero(difference))}
+
+    def build_border(self, border: Tuple[Cluster, Cluster]) -> None:
+        cost = self.cost
+        assert cost is not None
+
+        for node, other in self.borders.pop(border, []):
+            self.remove_crossing(node, other)
+            self.remove_crossing(other, node)
+
+        first, second = border
+        x1, y1, x2, y2 = self.cluster_bounds(first)
+
+        if second[0] != first[0] and second[1] != first[1]:
+            # diagonal neighbours, only step between them goes over the corner
+            if second[1] > first[1]:
+                node, other = (x2 - 1, y2 - 1), (x2, y2)
+            else:
+                node, other = (x2 - 1, y1), (x2, y1 - 1)
+            entrances = []
+            if cost[node] > 0 and cost[other] > 0:
+                self.add_crossing(node, other, DIAGONAL)
+                entrances.append((node, other))
+            self.borders[border] = entrances
+            return
+
+        if second[0] != first[0]:
+            # clusters side by side, border runs down between two columns of tiles
+            side, other_side = cost[x2 - 1, y1:y2], cost[x2, y1:y2]
+            to_nodes = lambda i, shift: ((x2 - 1, y1 + i), (x2, y1 + i + shift))
+        else:
+            # one above another, border runs between two rows
+            side, other_side = cost[x1:x2, y2 - 1], cost[x1:x2, y2]
+            to_nodes = lambda i, shift: ((x1 + i, y2 - 1), (x1 + i + shift, y2))
+
+        side, other_side = side > 0, other_side > 0
+        straight = side & other_side
+        # diagonal steps over the border, from i on this side to i + 1 on the other and back
+        # they only matter where neither tile is part of straight opening, otherwise
+        # that opening is reachable from both of them without leaving their clusters
+        forward = side[:-1] & other_side[1:] & ~straight[:-1] & ~straight[1:]
+        backward = side[1:] & other_side[:-1] & ~straight[:-1] & ~straight[1:]
+
+        entrances = []
+        for is_open, shift, step, first_tile in (
+            (straight, 0, CARDINAL, 0),
+            (forward, 1, DIAGONAL, 0),
+            (backward, -1, DIAGONAL, 1),
+        ):
+            # every run of open crossings becomes single entrance in its middle
+            padded = np.concatenate(([0], is_open, [0])).astype(np.int8)
+            edges = np.flatnonzero(np.diff(padded))
+            for start, end in zip(edges[::2], edges[1::2]):
+                node, other = to_nodes(first_tile + (start + end - 1) // 2, shift)
+                self.add_crossing(node, other, step)
+                entrances.append((node, other))
+
+        self.borders[border] = entrances
+
+    def add_crossing(self, node: Node, other: Node, step: int) -> None:
+        # both ways, each costing step times cost of the tile stepped on
+        cost = self.cost
+        assert cost is not None
+        self.crossings.setdefault(node, {})[other] = step * int(cost[other])
+        self.crossings.setdefault(other, {})[node] = step * int(cost[node])
+
+    def remove_crossing(self, node: Node, other: Node) -> None:
+        crossings = self.crossings.get(node)
+        if crossings is not None:
+            crossings.pop(other, None)
+            if not crossings:
+                del self.crossings[node]
+
+    def entrances_of(self, cluster: Cluster) -> List[Node]:
+        nodes: List[Node] = []
+        for other in self.neighbours_of(cluster):
+            border, side = ((cluster, other), 0) if cluster < other else ((other, cluster), 1)
+            nodes.extend(pair[side] for pair in self.borders.get(border, []))
+        # tile can be entrance of more than one border, near corners
+        return list(dict.fromkeys(nodes))
+
+    def distances_in_cluster(self, cluster: Cluster, root: Node, nodes: List[Node]) -> Dict[Node, int]:
+        # cost of walking from root to each of the nodes without leaving the cluster
+        x1, y1, x2, y2 = self.cluster_bounds(cluster)
+        cost = self.cost[x1:x2, y1:y2] # type: ignore
+
+        distance = tcod.path.maxarray(cost.shape, order = 'F')
+        distance[root[0] - x1, root[1] - y1] = 0
+        tcod.path.dijkstra2d(distance, cost, CARDINAL, DIAGONAL, out = distance)
+
+        unreachable = np.iinfo(distance.dtype).max
+        found = {}
+        for node in nodes:
+            value = int(distance[node[0] - x1, node[1] - y1])
+            if value != unreachable:
+                found[node] = value
+        return found
+
+    def build_cluster(self, cluster: Cluster) -> None:
+        nodes = self.entrances_of(cluster)
+        self.inner[cluster] = {
+            node: self.distances_in_cluster(cluster, node, [other for other in nodes if other != node])
+            for node in nodes
+        }
+
+    def find_path(self, cost: np.ndarray, start: Node, goal: Node) -> List[Node]:
+        # path from start to goal without the starting point, empty list if there is none
+        # cost is what the refined path is walked on, usually terrain with entities on top
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        if start_cluster == goal_cluster:
+            return find_path(cost, start, goal)
+
+        # connect start and goal with entrances of their clusters, just for this search
+        from_start = self.distances_in_cluster(start_cluster, start, self.entrances_of(start_cluster))
+        to_goal = self.distances_in_cluster(goal_cluster, goal, self.entrances_of(goal_cluster))
+
+        best: Dict[Node, int] = {start: 0}
+        came_from: Dict[Node, Node] = {}
+        queue = [(octile(start, goal), 0, start)]
+        no_edges: Dict[Node, int] = {}
+
+        while queue:
+            _, walked, node = heapq.heappop(queue)
+            if node == goal:
+                break
+            if walked > best[node]:
+                continue
+
+            edges: List[Dict[Node, int]]
+            if node == start:
+                # start can be entrance itself, with its crossings not in from_start
+                edges = [from_start, self.crossings.get(start, no_edges)]
+            else:
+                edges = [self.inner[self.cluster_of(node)].get(node, no_edges), self.crossings.get(node, no_edges)]
+                if node in to_goal:
+                    edges.append({goal: to_goal[node]})
+
+            for neighbours in edges:
+                for other, step in neighbours.items():
+                    total = walked + step
+                    if total < best.get(other, total + 1):
+                        best[other] = total
+                        came_from[other] = node
+                        heapq.heappush(queue, (total + octile(other, goal), total, other))
+        else:
+            # graph only keeps one entrance per opening, so it can miss ways that exist,
+            # better slow search than none at all
+            return find_path(cost, start, goal)
+
+        waypoints = [goal]
+        while waypoints[-1] != start:
+            waypoints.append(came_from[waypoints[-1]])
+        waypoints.reverse()
+
+        # refine with searches limited to around the route, each one skipping
+        # over as many waypoints as fit in couple of clusters
+        path: List[Node] = []
+        current = start
+        span = 2 * self.cluster_size
+        for i, waypoint in enumerate(waypoints[1:], 1):
+            following = waypoints[i + 1] if i + 1 < len(waypoints) else None
+            if following is not None and max(abs(following[0] - current[0]), abs(following[1] - current[1])) <= span:
+                continue
+
+            segment = find_path(cost, current, waypoint)
+            if not segment and current != waypoint:
+                # blocked by entities most likely, search the hard way
+                return find_path(cost, start, goal)
+            path.extend(segment)
+            current = waypoint
+
+        return path
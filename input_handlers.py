@@ -86,6 +86,10 @@ MainGameEventHandler will become the active handler.
 """
 
 class BaseEventHandler(tcod.event.EventDispatch[ActionHandler]):
+    # whether on_render draws only regions of the screen that changed since last frame,
+    # handlers drawing overlays on top of the game redraw everything instead
+    incremental_render = False
+
     def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
         '''handle event and return next active event handler'''
         state = self.dispatch(event)
@@ -168,6 +172,8 @@ class EventHandler(BaseEventHandler):
         self.engine.render(console)
 
 class MainGameEventHandler(EventHandler):
+    incremental_render = True
+
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionHandler]:
         action: Optional[Action] = None
 
@@ -236,10 +242,13 @@ class MainGameEventHandler(EventHandler):
         return action
 
 class GameOverEventHandler(EventHandler):
+    incremental_render = True
+
     def on_quit(self) -> None:
         # handle exiting out of finished game
         if os.path.exists("save_game.sav"):
             os.remove("save_game.sav") # delete active file save
+        self.engine.message_log.delete_segment() # along with older messages it pointed to
         raise exceptions.QuitWithoutSaving() # avoid saving finished game
 
     def ev_quit(self, event: tcod.event.Quit) -> None:
@@ -254,7 +263,7 @@ class HistoryViewer(EventHandler):
     # show log history on a larger window with page scrolling
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
 
     def on_render(self, console: tcod.console.Console) -> None:
@@ -275,7 +284,8 @@ class HistoryViewer(EventHandler):
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.engine.message_log,
+            stop = self.cursor + 1,
         )
         log_console.blit(console, 3, 3)
 
@@ -390,9 +400,10 @@ class InteractionSelectionEventHandler(AskUserEventHandler):
         else:
             self.interactions_list = INTERACTIONS['other']
 
-        try:
-            self.TITLE = self.engine.game_map.get_blocking_entity_at_location(self.selected_target[0], self.selected_target[1]).name
-        except AttributeError:
+        target = self.engine.game_map.get_blocking_entity_at_location(self.selected_target[0], self.selected_target[1])
+        if target is not None:
+            self.TITLE = target.name
+        else:
             self.TITLE = "Non-entity type"
 
         height = len(self.interactions_list) + 2
@@ -435,8 +446,9 @@ class InteractionSelectionEventHandler(AskUserEventHandler):
         index = key - tcod.event.KeySym.a
 
         if 0 <= index <= 26:
-            if hasattr(self.selected_target, 'name'):
-                print(f'Option {self.interactions_list[index]}, target at: {self.selected_target} it was {self.engine.game_map.get_blocking_entity_at_location(self.selected_target[0], self.selected_target[1]).name}')
+            target = self.engine.game_map.get_blocking_entity_at_location(self.selected_target[0], self.selected_target[1])
+            if hasattr(self.selected_target, 'name') and target is not None:
+                print(f'Option {self.interactions_list[index]}, target at: {self.selected_target} it was {target.name}')
             else:
                 print(f'Option {self.interactions_list[index]}, target at: {self.selected_target}')
         
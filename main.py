@@ -25,6 +25,8 @@ def main() -> None:
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
 
     root_console = tcod.console.Console(screen_width, screen_height, order = 'F')
+    # engine whose incremental frame is on the console, None after any full redraw
+    drawn_engine = None
 
     with tcod.context.new(
         columns = screen_width,
@@ -35,8 +37,15 @@ def main() -> None:
     ) as context:
         try:
             while True:
-                root_console.clear()
+                engine = getattr(handler, 'engine', None)
+                if not handler.incremental_render or engine is None or engine is not drawn_engine:
+                    # overlay, new game or coming back from overlay, draw everything from scratch
+                    root_console.clear()
+                    if engine is not None:
+                        engine.render_keys.clear()
+
                 handler.on_render(console = root_console)
+                drawn_engine = engine if handler.incremental_render else None
                 context.present(root_console)
 
                 try:
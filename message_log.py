@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Reversible, Tuple
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import json
+import os
+import glob
 import textwrap
 
 import tcod
@@ -11,6 +15,21 @@ class Message:
         self.plain_text = text
         self.fg = fg
         self.count = 1
+        # lines wrapped to given width, with count they were wrapped for
+        self._wrapped: Dict[int, Tuple[int, List[str]]] = {}
+
+    def __getstate__(self) -> dict:
+        # wrapped lines are cheap to redo, no need to save them
+        state = self.__dict__.copy()
+        state['_wrapped'] = {}
+        return state
+
+    def wrapped(self, width: int) -> List[str]:
+        # full text wrapped to width, done again only after message got stacked
+        cached = self._wrapped.get(width)
+        if cached is None or cached[0] != self.count:
+            cached = self._wrapped[width] = (self.count, list(MessageLog.wrap(self.full_text, width)))
+        return cached[1]
 
     @property
     def full_text(self) -> str:
@@ -19,9 +38,120 @@ class Message:
             return f'{self.plain_text} (x{self.count})'
         return self.plain_text
 
+# messages kept in memory, older ones go to segment file on disk
+CAPACITY = 1024
+# messages written to segment file at once, and read back at once when scrolling through history
+PAGE = 256
+SEGMENT_FOLDER = 'saves'
+# same name as the save file main.py writes, without extension
+SAVE_SLOT = 'save_game'
+
+def segment_path_for(slot: str) -> str:
+    return os.path.join(SEGMENT_FOLDER, f'messages_{slot}.log')
+
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    def __init__(self, capacity: int = CAPACITY, slot: str = SAVE_SLOT) -> None:
+        # most recent messages only, see __getitem__ for the whole history
+        self.messages: Deque[Message] = deque()
+        self.capacity = capacity
+
+        # file with older messages, one json line per message, created on first spill
+        # and named after the save slot, so new game in the same slot replaces it
+        self.slot = slot
+        self.segment_path: Optional[str] = None
+        # bytes written to segment file by this log, anything after it was written
+        # by a game that ended without saving
+        self.segment_size = 0
+        # byte offset of each page of messages in segment file
+        self.page_offsets: List[int] = []
+        # last page read back from segment file
+        self._page: Optional[Tuple[int, List[Message]]] = None
+
+    def __getstate__(self) -> dict:
+        # saves keep recent messages and where to find the rest
+        state = self.__dict__.copy()
+        state['_page'] = None
+        return state
+
+    @property
+    def spilled(self) -> int:
+        # number of messages moved to segment file
+        return len(self.page_offsets) * PAGE
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.messages)
+
+    def __getitem__(self, index: int) -> Message:
+        # any message from the whole history, older ones are read from disk a page at a time
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('message index out of range')
+
+        if index >= self.spilled:
+            return self.messages[index - self.spilled]
+
+        return self.read_page(index // PAGE)[index % PAGE]
+
+    def read_page(self, page: int) -> List[Message]:
+        if self._page is None or self._page[0] != page:
+            assert self.segment_path is not None
+            messages = []
+            with open(self.segment_path, 'rb') as file:
+                file.seek(self.page_offsets[page])
+                for _ in range(PAGE):
+                    text, fg, count = json.loads(file.readline())
+                    message = Message(text, tuple(fg)) # type: ignore
+                    message.count = count
+                    messages.append(message)
+            self._page = (page, messages)
+
+        return self._page[1]
+
+    def spill(self) -> None:
+        # move oldest page of messages from memory to the end of segment file
+        if self.segment_path is None:
+            os.makedirs(SEGMENT_FOLDER, exist_ok = True)
+            self.segment_path = segment_path_for(self.slot)
+            # whatever is there belongs to a game this log isn't part of
+            open(self.segment_path, 'wb').close()
+
+        lines = []
+        for _ in range(PAGE):
+            message = self.messages.popleft()
+            lines.append(json.dumps([message.plain_text, list(message.fg), message.count]).encode() + b'\n')
+
+        # appending keeps pages written before intact, so older saves pointing
+        # to the same file still find their messages
+        with open(self.segment_path, 'ab') as file:
+            self.page_offsets.append(file.seek(0, os.SEEK_END))
+            file.write(b''.join(lines))
+            self.segment_size = file.tell()
+
+    def delete_segment(self) -> None:
+        if self.segment_path is not None and os.path.exists(self.segment_path):
+            os.remove(self.segment_path)
+
+    def clean_segments(self) -> None:
+        # called on new game and load, segment files are only removed on clean exit,
+        # so abandoned or crashed games leave theirs behind
+        for path in glob.glob(os.path.join(SEGMENT_FOLDER, 'messages_*.log')):
+            if path != self.segment_path:
+                os.remove(path)
+
+        if self.segment_path is None:
+            return
+
+        if not os.path.exists(self.segment_path) or os.path.getsize(self.segment_path) < self.segment_size:
+            # older messages are gone, keep the history that is still in memory
+            self.segment_path = None
+            self.segment_size = 0
+            self.page_offsets = []
+            return
+
+        # drop pages written after this log was saved
+        with open(self.segment_path, 'r+b') as file:
+            file.truncate(self.segment_size)
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -33,6 +163,8 @@ class MessageLog:
             self.messages[-1].count += 1
         else:
             self.messages.append(Message(text, fg))
+            if len(self.messages) >= self.capacity + PAGE:
+                self.spill()
 
     def render(
         self, console: tcod.console.Console, x: int, y: int, width: int, height: int,
@@ -40,7 +172,7 @@ class MessageLog:
         # render the log in given area
         # x and y is the left top corner position
         # width, heigh are the dimensions of th rectangular region rendered onto console
-        self.render_messages(console, x, y, width, height, self.messages)
+        self.render_messages(console, x, y, width, height, self)
 
     @staticmethod
     def wrap(string: str, width: int) -> Iterable[str]:
@@ -58,15 +190,18 @@ class MessageLog:
         y: int,
         width: int,
         height: int,
-        messages: Reversible[Message],
+        messages: Union[Sequence[Message], MessageLog],
+        stop: Optional[int] = None,
     ) -> None:
-        # render the messages provided
+        # render the messages provided, up to (without) the one at stop index
         # we start with last and work backwards,
         # it makes them look like they are scrolling upwards
         y_offset = height - 1
+        stop = len(messages) if stop is None else min(stop, len(messages))
 
-        for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+        for index in range(stop - 1, -1, -1):
+            message = messages[index]
+            for line in reversed(message.wrapped(width)):
                 console.print(x = x, y = y + y_offset, string = line, fg = message.fg)
                 y_offset -= 1
                 if y_offset < 0:
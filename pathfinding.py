@@ -0,0 +1,74 @@
+'''Point to point path search over cost arrays, used by AIs walking to targets of their own'''
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tcod
+
+# how many tiles around start and goal the first search window reaches
+WINDOW_MARGIN = 8
+
+# movement costs, same as everywhere else in the game
+CARDINAL = 2
+DIAGONAL = 3
+
+def find_path(
+    cost: np.ndarray,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    margin: Optional[int] = WINDOW_MARGIN,
+) -> List[Tuple[int, int]]:
+    # path from start to goal without the starting point, empty list if there is none
+    # search is cropped to window around both points, which doubles in size until
+    # path is found that nothing leaving the window could beat, or it covers whole map
+    # margin None searches whole map right away
+    width, height = cost.shape
+    start_x, start_y = start
+    goal_x, goal_y = goal
+
+    while True:
+        if margin is None:
+            x1, y1, x2, y2 = 0, 0, width, height
+        else:
+            x1 = max(0, min(start_x, goal_x) - margin)
+            y1 = max(0, min(start_y, goal_y) - margin)
+            x2 = min(width, max(start_x, goal_x) + margin + 1)
+            y2 = min(height, max(start_y, goal_y) + margin + 1)
+
+        path, distance = search_window(
+            cost[x1:x2, y1:y2], (start_x - x1, start_y - y1), (goal_x - x1, goal_y - y1)
+        )
+
+        if (x1, y1, x2, y2) == (0, 0, width, height):
+            break
+        # any path leaving the window walks at least margin + 1 tiles out and back again,
+        # every step costing no less than CARDINAL, so found one can't be beaten
+        if path and distance <= 2 * (margin + 1) * CARDINAL: # type: ignore
+            break
+
+        if path:
+            # window big enough to prove this path (or find better one) on the next try
+            margin = distance // (2 * CARDINAL)
+        else:
+            margin = 2 * margin # type: ignore
+
+    return [(x + x1, y + y1) for x, y in path]
+
+def search_window(
+    cost: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]
+) -> Tuple[List[Tuple[int, int]], int]:
+    # A* over the given cost array, returns path without the starting point and its cost
+    graph = tcod.path.SimpleGraph(cost = cost, cardinal = CARDINAL, diagonal = DIAGONAL)
+    graph.set_heuristic(cardinal = CARDINAL, diagonal = DIAGONAL)
+
+    pathfinder = tcod.path.Pathfinder(graph)
+    pathfinder.add_root(start)
+
+    # tcod returns just the goal when it can't be reached
+    path: List[List[int]] = pathfinder.path_to(goal).tolist()
+    if tuple(path[0]) != start:
+        return [], 0
+
+    # convert from List[List] to List[Tuple] and remove starting point
+    return [(index[0], index[1]) for index in path[1:]], int(pathfinder.distance[goal])
@@ -13,7 +13,7 @@ import entity_factories
 from helpers.rng import nprng
 from helpers.region_connection import connect_regions
 
-from generators.cellular_automata import cellular_automata
+from generators.cellular_automata import CellularAutomata, wall_rule
 from generators.room_generator import generate_rooms
 from generators.decorators import add_features, add_aquifers
 
@@ -137,7 +137,7 @@ def place_entities(dungeon: GameMap, floor_number: int) -> None:
         # check if the selected spot doesn't contain any entity already
         # if it does not then place one of the monsters
         # 80% chance for orc 20% for troll
-        if not any(entity.x == x[j] and entity.y == y[j] for entity in dungeon.entities):
+        if not dungeon.get_entities_at_location(x[j], y[j]):
             entity.spawn(x[j], y[j], dungeon)
             # if entity is entity_factories.goblin:
             #     entity_factories.sword.spawn(dungeon, x[j] - 2, y[j])
@@ -163,8 +163,6 @@ def generate_dungeon(
     # Generate a new dungeon map.
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities = [player])
-    # helper map to hold convolve calculation
-    wall_count = GameMap(engine, map_width, map_height)
 
     # dang fast way of filling map randomly
     dungeon.tiles = np.where(map_nprng[0].integers(0, 100, (map_height, map_width)).T > initial_open,
@@ -174,18 +172,22 @@ def generate_dungeon(
     dungeon.tiles[[0, -1], :] = tile_types.wall
     dungeon.tiles[:, [0, -1]] = tile_types.wall
 
-    # we go through the map and simulate cellular automata rules using convolve values
-    for _ in range(cellulara_repeats):
-        cellular_automata(dungeon, 4, wall_count)
+    # we go through the map and simulate cellular automata rules on counts of floor neighbours
+    automata = CellularAutomata(dungeon.tiles['walkable'])
+    automata.run(wall_rule(4), cellulara_repeats)
+    automata.write_back(dungeon)
 
     # for _ in range(1):
     #     generate_rooms(dungeon, 10, 4, 10, nprng)
 
-    connect_regions(dungeon, nprng)
+    connect_regions(dungeon, nprng, mode = 'mst')
 
+    # smooth out the tunnels, same buffers picking up tiles they carved
+    automata.load(dungeon.tiles['walkable'])
     for _ in range(2):
-        cellular_automata(dungeon, 6, wall_count)
-        cellular_automata(dungeon, 5, wall_count)
+        automata.step(wall_rule(6))
+        automata.step(wall_rule(5))
+    automata.write_back(dungeon)
     
     add_features(dungeon)
 
@@ -197,6 +199,10 @@ def generate_dungeon(
     dungeon.tiles[[0, -1], :] = tile_types.wall
     dungeon.tiles[:, [0, -1]] = tile_types.wall
 
+    # smoothing, rock features and the outer wall can cut off narrow passages,
+    # join whatever got split up again with plain tunnels
+    connect_regions(dungeon, nprng, mode = 'mst')
+
     # place entities and player on empty non occupied walkable tiles
     place_entities(dungeon, engine.game_world.current_floor)
 
@@ -12,11 +12,14 @@ def get_name_at_location(x: int, y: int, game_map: GameMap) -> str:
     if not game_map.in_bounds(x, y) or not game_map.visible[x, y]:
         return 'Out of bounds'
 
-    names = ', '.join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
-    )
+    # names of a tile stay cached until entity on it is added, removed, moved or changed
+    names = game_map.name_cache.get((x, y))
+    if names is None:
+        names = game_map.name_cache[x, y] = ', '.join(
+            entity.name for entity in game_map.get_entities_at_location(x, y)
+        ).capitalize()
 
-    return names.capitalize()
+    return names
 
 def render_bar(
     console: Console,
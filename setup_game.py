@@ -33,6 +33,7 @@ def new_game() -> Engine:
     player = copy.deepcopy(entity_factories.player)
 
     engine = Engine(player = player)
+    engine.message_log.clean_segments()
 
     engine.game_world = GameWorld(
         engine = engine,
@@ -71,7 +72,8 @@ def load_game(filename: str) -> Engine:
     with open(path_to_load, 'rb') as f:
         engine = pickle.loads(lzma.decompress(f.read()))
     assert isinstance(engine, Engine)
-    
+    engine.message_log.clean_segments()
+
     return engine
 
 class MainMenu(input_handlers.BaseEventHandler):
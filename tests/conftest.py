@@ -0,0 +1,46 @@
+# tests import game modules the same way the game does, from the source folder
+# run them from there with `python -m pytest tests`
+from __future__ import annotations
+
+import copy
+import os
+import sys
+from typing import Callable
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entity_factories
+import tile_types
+from engine import Engine
+from game_map import GameMap, GameWorld
+
+def build_engine(map_width: int, map_height: int) -> Engine:
+    # engine with single open floor (walls only around the edges) and player in the middle
+    # nothing gets drawn, so no window or console is needed
+    player = copy.deepcopy(entity_factories.player)
+    engine = Engine(player = player)
+
+    engine.game_world = GameWorld(
+        engine = engine,
+        viewport_width = min(map_width, 80),
+        viewport_height = min(map_height, 40),
+        map_width = map_width,
+        map_height = map_height,
+        initial_open = 49,
+        cellulara_repeats = 7,
+        floors_list = {},
+    )
+
+    game_map = GameMap(engine, map_width, map_height)
+    game_map.tiles[1:-1, 1:-1] = tile_types.floor
+    engine.game_map = game_map
+
+    player.place(map_width // 2, map_height // 2, game_map)
+
+    return engine
+
+@pytest.fixture
+def make_engine() -> Callable[[int, int], Engine]:
+    return build_engine
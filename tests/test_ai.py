@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import copy
+
+import entity_factories
+from components.ai import CowardlyEnemy, FleeingEnemy, FLEE_TURNS, SimpleHostileEnemy
+
+def distance_to_player(engine, x: int, y: int) -> int:
+    return max(abs(x - engine.player.x), abs(y - engine.player.y))
+
+def test_flee_map_leads_away_from_player(make_engine):
+    engine = make_engine(40, 40)
+    game_map = engine.game_map
+    x, y = engine.player.x + 2, engine.player.y
+
+    step = game_map.dijkstra_maps.get_step('flee', x, y)
+    assert step is not None
+    assert distance_to_player(engine, *step) > 2
+
+def test_simple_hostile_enemy_keeps_fighting_on_low_hp(make_engine):
+    engine = make_engine(40, 40)
+    orc = copy.deepcopy(entity_factories.orc)
+    orc.place(engine.player.x + 2, engine.player.y, engine.game_map)
+    engine.update_fov()
+
+    orc.fighter.hp = 1
+    engine.handle_enemy_turns()
+
+    assert isinstance(orc.ai, SimpleHostileEnemy)
+    assert distance_to_player(engine, orc.x, orc.y) == 1
+
+def test_cowardly_enemy_flees_once_on_low_hp(make_engine):
+    engine = make_engine(40, 40)
+    orc = copy.deepcopy(entity_factories.orc)
+    orc.place(engine.player.x + 2, engine.player.y, engine.game_map)
+    orc.ai = CowardlyEnemy(orc)
+    engine.update_fov()
+
+    orc.fighter.hp = 1
+    start = distance_to_player(engine, orc.x, orc.y)
+    engine.handle_enemy_turns()
+
+    assert isinstance(orc.ai, FleeingEnemy)
+    assert distance_to_player(engine, orc.x, orc.y) > start
+
+    # back to hunting once fleeing runs out, and it doesn't run away again
+    for _ in range(FLEE_TURNS + 1):
+        engine.handle_enemy_turns()
+
+    assert isinstance(orc.ai, CowardlyEnemy)
+    assert orc.ai.has_fled
+
+def test_unset_stairs_are_not_goals(make_engine):
+    engine = make_engine(40, 40)
+    game_map = engine.game_map
+
+    assert game_map.dijkstra_maps.get('stairs')[0, 0] != 0
+
+    game_map.downstairs_location = (5, 5)
+    stairs = game_map.dijkstra_maps.get('stairs')
+    assert stairs[5, 5] == 0
+    assert stairs[0, 0] != 0
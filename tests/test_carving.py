@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Set, Tuple
+
+import numpy as np
+
+import tile_types
+from helpers import carving
+
+def as_set(points: carving.Points) -> Set[Tuple[int, int]]:
+    return set(zip(points[0].tolist(), points[1].tolist()))
+
+def test_corridors_leave_out_ends_and_corner():
+    points = carving.corridors([(1, 1), (5, 5)], [(4, 3), (5, 2)], [True, False])
+    assert as_set(points) == {(2, 1), (3, 1), (4, 2), (5, 4), (5, 3)}
+
+def test_corridors_with_endpoints_are_connected():
+    points = carving.corridors([(1, 1)], [(4, 3)], [False], endpoints = True)
+    assert as_set(points) == {(1, 1), (1, 2), (1, 3), (2, 3), (3, 3), (4, 3)}
+
+def test_rectangles_and_outlines():
+    assert as_set(carving.rectangles([(1, 2, 3, 4)])) == {(1, 2), (1, 3), (2, 2), (2, 3)}
+    outline = as_set(carving.outlines([(0, 0, 3, 3)]))
+    assert outline == {(x, y) for x in range(3) for y in range(3)} - {(1, 1)}
+
+def test_discs():
+    assert as_set(carving.discs([(5, 5)], 0)) == {(5, 5)}
+    assert as_set(carving.discs([(5, 5)], 1)) == {(5, 5), (4, 5), (6, 5), (5, 4), (5, 6)}
+    assert as_set(carving.discs([(5, 5)], 1.5)) == {(x, y) for x in range(4, 7) for y in range(4, 7)}
+
+def test_carve_drops_points_outside_map(make_engine):
+    engine = make_engine(10, 8)
+    game_map = engine.game_map
+    game_map.tiles[...] = tile_types.wall
+
+    carving.carve(game_map, tile_types.floor, carving.discs([(0, 0), (9, 7)], 1.5))
+
+    walkable = game_map.tiles['walkable']
+    expected = np.zeros((10, 8), dtype = bool)
+    expected[:2, :2] = True
+    expected[-2:, -2:] = True
+    assert (walkable == expected).all()
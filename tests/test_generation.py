@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from scipy import ndimage # type: ignore
+
+import procgen
+
+@pytest.mark.parametrize('seed', range(20))
+def test_floor_is_single_region(make_engine, seed):
+    # generation draws from the module wide generators, start them from the seed
+    procgen.nprng.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+    procgen.map_nprng[0].bit_generator.state = np.random.default_rng(seed + 1000).bit_generator.state
+
+    engine = make_engine(80, 40)
+    dungeon = procgen.generate_dungeon(80, 40, 49, 7, engine)
+
+    _, count = ndimage.label(dungeon.tiles['walkable'])
+    assert count == 1
+    # stairs and player spawn are on the same floor tiles
+    assert dungeon.tiles['walkable'][dungeon.downstairs_location]
+    assert dungeon.tiles['walkable'][engine.player.x, engine.player.y]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+
+from hierarchical_pathfinding import HierarchicalGraph
+from pathfinding import find_path
+
+def search(cost, start, goal):
+    graph = HierarchicalGraph()
+    graph.update(cost, 0)
+    return graph.find_path(cost, start, goal)
+
+def test_clusters_meeting_only_at_corner():
+    cost = np.zeros((64, 64), dtype = np.int8)
+    cost[1:16, 1:16] = 1
+    cost[16:31, 16:31] = 1
+    cost[15, 14] = cost[14, 15] = 0
+
+    path = search(cost, (2, 2), (30, 30))
+    assert len(path) == len(find_path(cost, (2, 2), (30, 30))) == 28
+
+def test_start_on_entrance():
+    cost = np.zeros((64, 64), dtype = np.int8)
+    cost[15:40, 5] = 1
+
+    path = search(cost, (15, 5), (39, 5))
+    assert path == [(x, 5) for x in range(16, 40)]
+
+def test_diagonal_step_over_border():
+    cost = np.zeros((64, 64), dtype = np.int8)
+    cost[2:16, 5] = 1
+    cost[16:40, 6] = 1
+
+    path = search(cost, (2, 5), (39, 6))
+    assert len(path) == 37
+    assert all(cost[node] for node in path)
+
+def test_update_matches_rebuild():
+    rng = np.random.default_rng(7)
+    cost = (rng.random((80, 64)) < .6).astype(np.int8)
+    graph = HierarchicalGraph()
+    graph.update(cost, 0)
+
+    cost[30:40, 14:20] = 0
+    graph.update(cost, 1)
+    rebuilt = HierarchicalGraph()
+    rebuilt.update(cost, 1)
+
+    assert graph.borders == rebuilt.borders
+    assert graph.crossings == rebuilt.crossings
+    assert graph.inner == rebuilt.inner
@@ -0,0 +1,58 @@
+'''Tiles of a map kept as grid of tile ids, see tile_types.TILES
+
+Map stores single byte per tile, fields are looked up from table of registered tiles
+when asked for and cached until tiles change. Indexing with field name, tiles['walkable'],
+gives such contiguous, read only array that can be passed to compute_fov, convolve2d
+or pathfinding as is. Indexing with anything else gives tile records, assigning tiles to it
+works the same as with structured array, tiles[x, y] = tile_types.floor.
+'''
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+import tile_types
+
+class TileStore:
+    def __init__(self, width: int, height: int, fill_value: np.ndarray = tile_types.wall):
+        self.ids = np.full((width, height), fill_value = fill_value['id'], dtype = np.uint8, order = 'F')
+        # bumped on every write through this store
+        # writes into ids directly have to bump it themselves
+        self.version = 0
+        # field arrays looked up from ids, with version they were made for
+        self._fields: Dict[str, Tuple[int, np.ndarray]] = {}
+
+    def __getstate__(self) -> dict:
+        # only ids are worth saving, fields get looked up again after loading
+        state = self.__dict__.copy()
+        state['_fields'] = {}
+        return state
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        width, height = self.ids.shape
+        return width, height
+
+    def clear_cache(self) -> None:
+        # drop looked up fields, for maps that won't be used for a while
+        self._fields.clear()
+
+    def field(self, name: str) -> np.ndarray:
+        cached = self._fields.get(name)
+        if cached is None or cached[0] != self.version:
+            values = tile_types.tile_table()[name][self.ids]
+            values.flags.writeable = False
+            cached = self._fields[name] = (self.version, values)
+
+        return cached[1]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if isinstance(key, str):
+            return self.field(key)
+
+        return tile_types.tile_table()[self.ids[key]]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.ids[key] = np.asarray(value, dtype = tile_types.tile_dt)['id']
+        self.version += 1
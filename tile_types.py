@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np  # type: ignore
 import color
@@ -22,9 +22,15 @@ tile_dt = np.dtype(
         ('transparent', np.bool_),   # True if this tile doesn't block FOV.
         ('dark', graphic_dt),   # Graphics for when this tile is not in FOV.
         ('light', graphic_dt),   # Graphics for when this tile is in FOV.
+        ('id', np.uint8),   # Index in TILES, maps store only this.
     ]
 )
 
+# every tile type defined with new_tile, in order of definition
+# saved maps refer to tiles by their position here, so add new ones at the end
+TILES: List[np.ndarray] = []
+_table: Optional[np.ndarray] = None
+
 def new_tile(
     *,  # Enforce the use of keywords, so that parameter order doesn't matter.
     weight: int,
@@ -33,12 +39,26 @@ def new_tile(
     dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
     light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
 ) -> np.ndarray:
-    '''Helper function for defining individual tile types '''
-    return np.array((weight, walkable, transparent, dark, light), dtype = tile_dt)
+    '''Helper function for defining individual tile types, registers them under next free id '''
+    assert len(TILES) <= np.iinfo(np.uint8).max, 'Tile ids ran out'
+    tile = np.array((weight, walkable, transparent, dark, light, len(TILES)), dtype = tile_dt)
+    TILES.append(tile)
+    return tile
+
+def tile_table() -> np.ndarray:
+    '''Lookup table of all registered tiles, tile_table()[field][ids] gives field for map of ids '''
+    global _table
+    if _table is None or len(_table) != len(TILES):
+        _table = np.array(TILES, dtype = tile_dt)
+    return _table
 
 # unexplored, unseen tiles
 SHROUD = np.array((ord(' '), (color.white), (color.black)), dtype = graphic_dt)
 
+# graphics viewed as opaque bytes, picking them with np.where is several times faster than records
+graphic_raw_dt = np.dtype((np.void, graphic_dt.itemsize))
+SHROUD_RAW = SHROUD.reshape(1).view(graphic_raw_dt)[0]
+
 placeholder = new_tile(
     weight = -100,
     walkable = True,